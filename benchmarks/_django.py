@@ -0,0 +1,35 @@
+"""
+Shared setup for benchmark scripts that need the ORM.
+
+``setup_django()`` configures the project settings; ``throwaway_database()``
+creates a fresh test database (in-memory for SQLite) so benchmarks never touch
+the development db.sqlite3.
+"""
+import contextlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rentalConnect.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def throwaway_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Benchmark mixed read/write traffic from concurrent workers against the
+database profiles in ``settings.DATABASES``.
+
+Profiles:
+    sqlite-legacy   file SQLite with Django's defaults (rollback journal,
+                    DEFERRED transactions, 5s busy timeout), as before
+    sqlite          the tuned SQLite profile (WAL, IMMEDIATE, pragmas)
+    postgres        the PostgreSQL profile; needs DATABASE_URL=postgresql://...
+                    and a role allowed to create the test database
+
+Each worker thread has its own connection and loops for ``--seconds``:
+with probability ``--write-ratio`` it runs a chat-style write (count unread
+messages, then insert one, in one transaction), otherwise it reads a page
+of listing cards and a page of chat history. Failed operations (e.g.
+"database is locked") are counted, not retried.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--profiles sqlite-legacy sqlite] [--workers 8] [--seconds 10]
+
+Every profile runs in its own subprocess against a throwaway database (a
+temporary file for SQLite), so the development db is untouched.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._django import setup_django, throwaway_database  # noqa: E402
+
+PROFILES = ('sqlite-legacy', 'sqlite', 'postgres')
+
+
+def configure(profile, directory):
+    """Point the default database at ``profile`` before any connection is opened."""
+    from django.conf import settings
+
+    db = settings.DATABASES['default']
+    if profile == 'postgres':
+        if db['ENGINE'] != 'django.db.backends.postgresql':
+            raise SystemExit('postgres profile needs DATABASE_URL=postgresql://...')
+        return
+    if db['ENGINE'] != 'django.db.backends.sqlite3':
+        raise SystemExit(f'{profile} profile needs DATABASE_URL unset')
+    if profile == 'sqlite-legacy':
+        db['OPTIONS'] = {}
+    elif not settings.SQLITE_WAL:
+        # the tuned profile is measured with WAL, which deployments opt into
+        db['OPTIONS']['init_command'] = ';'.join([
+            'PRAGMA journal_mode=WAL', 'PRAGMA synchronous=NORMAL', settings.SQLITE_PRAGMAS,
+        ])
+    # a real file: in-memory databases have no cross-connection locking to measure
+    db['TEST']['NAME'] = os.path.join(directory, f'{profile}.sqlite3')
+
+
+def populate(rooms):
+    from datetime import timedelta
+    from django.utils import timezone
+    from listings.models import Booking, BookingMessage, Property
+    from users.models import CustomUser
+
+    start = timezone.now().date() + timedelta(days=7)
+    bookings = []
+    for i in range(rooms):
+        landlord = CustomUser.objects.create_user(username=f'db_landlord_{i}', password='x', is_landlord=True)
+        tenant = CustomUser.objects.create_user(username=f'db_tenant_{i}', password='x', is_tenant=True)
+        prop = Property.objects.create(
+            landlord=landlord, title=f'Flat {i}', description='', city='Kathmandu',
+            rent='10000', bedrooms=1, bathrooms=1, address='-', is_verified=True,
+        )
+        booking = Booking.objects.create(
+            tenant=tenant, property=prop, start_date=start, end_date=start + timedelta(days=30),
+        )
+        BookingMessage.objects.bulk_create(
+            BookingMessage(booking=booking, sender=tenant, content='hello') for _ in range(20)
+        )
+        bookings.append((booking.pk, tenant.pk))
+    return bookings
+
+
+def worker(bookings, seconds, write_ratio, seed, results):
+    from django.db import connection, transaction
+    from listings.models import BookingMessage, Property
+
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            booking_id, sender_id = rng.choice(bookings)
+            is_write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                if is_write:
+                    with transaction.atomic():
+                        BookingMessage.objects.filter(booking_id=booking_id, is_read=False).count()
+                        BookingMessage.objects.create(booking_id=booking_id, sender_id=sender_id, content='bench')
+                else:
+                    list(Property.objects.filter(is_verified=True).select_related('cover_image')
+                         .order_by('-created_at')[:10])
+                    list(BookingMessage.objects.filter(booking_id=booking_id).order_by('-created_at')[:30])
+            except Exception:
+                errors += 1
+                continue
+            (writes if is_write else reads).append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    results.append((reads, writes, errors))
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_profile(profile, workers, seconds, write_ratio, rooms):
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django()
+        configure(profile, directory)
+        with throwaway_database():
+            bookings = populate(rooms)
+            results = []
+            threads = [
+                threading.Thread(target=worker, args=(bookings, seconds, write_ratio, i, results))
+                for i in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    reads = [t for r, _, _ in results for t in r]
+    writes = [t for _, w, _ in results for t in w]
+    return {
+        'ops_per_s': (len(reads) + len(writes)) / seconds,
+        'read_p50_ms': statistics.median(reads) * 1000 if reads else float('nan'),
+        'read_p95_ms': percentile(reads, 0.95) * 1000,
+        'write_p50_ms': statistics.median(writes) * 1000 if writes else float('nan'),
+        'write_p95_ms': percentile(writes, 0.95) * 1000,
+        'errors': sum(e for _, _, e in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=['sqlite-legacy', 'sqlite'])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--rooms', type=int, default=20, help='bookings (chat rooms) to spread traffic over')
+    parser.add_argument('--child', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, args.workers, args.seconds, args.write_ratio, args.rooms)))
+        return
+
+    print(f"{args.workers} workers, {args.seconds:g}s, {args.write_ratio:.0%} writes")
+    header = (f"{'profile':>14}  {'ops/s':>8}  {'read p50':>9}  {'read p95':>9}  "
+              f"{'write p50':>9}  {'write p95':>9}  {'errors':>6}")
+    print(header)
+    print('-' * len(header))
+    for profile in args.profiles:
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', profile,
+             '--workers', str(args.workers), '--seconds', str(args.seconds),
+             '--write-ratio', str(args.write_ratio), '--rooms', str(args.rooms)],
+            capture_output=True, text=True,
+        )
+        if child.returncode != 0:
+            print(f"{profile:>14}  failed: {child.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"{profile:>14}  {r['ops_per_s']:8.0f}  {r['read_p50_ms']:7.2f}ms  {r['read_p95_ms']:7.2f}ms  "
+              f"{r['write_p50_ms']:7.2f}ms  {r['write_p95_ms']:7.2f}ms  {r['errors']:>6}")
+
+
+if __name__ == '__main__':
+    main()
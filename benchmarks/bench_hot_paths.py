@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Benchmark the listings hot paths on a reproducible synthetic dataset and
+save the results as JSON, so runs can be compared across commits.
+
+A throwaway database is filled by ``listings.fake_data.generate`` (fixed
+seed), then every path is run ``--iterations`` times after ``--warmup``
+runs: views through the Django test client (anonymous, tenant and landlord
+sessions) and the underlying functions called directly. For each path the
+report has p50/p95/max/mean latency and the median query count.
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--scale small|medium|large] [--iterations 20]
+        [--output results.json] [--compare previous.json] [--page-cache] [--cold]
+
+The anonymous page cache is disabled unless ``--page-cache`` is given, so
+the views' own work is measured; ``--cold`` clears the cache before every
+iteration. Results go to benchmarks/results/hot_paths-<commit>.json by
+default.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._django import ROOT, setup_django, throwaway_database  # noqa: E402
+
+SCALES = {
+    'small': dict(landlords=20, tenants=100, properties=500, bookings=1000),
+    'medium': dict(landlords=100, tenants=1000, properties=5000, bookings=10000),
+    'large': dict(landlords=500, tenants=5000, properties=25000, bookings=50000),
+}
+ORIGIN = (27.7172, 85.3240)  # Kathmandu Durbar Square
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def hot_paths():
+    """[(name, callable)] for every measured path; built once the data exists."""
+    from django.test import Client
+    from listings.fake_data import DEFAULT_PREFIX
+    from listings.models import Booking, Property
+    from listings.utils import nearest_properties
+    from listings.views import fuzzy_search_properties, get_popular_properties, get_property_recommendations
+
+    booking = (
+        Booking.objects.filter(tenant__username__startswith=DEFAULT_PREFIX, status='approved')
+        .select_related('tenant', 'property__landlord').order_by('pk').first()
+    )
+    tenant, landlord = booking.tenant, booking.property.landlord
+    prop = Property.objects.filter(is_verified=True).order_by('pk').first()
+
+    anonymous, as_tenant, as_landlord = Client(), Client(), Client()
+    as_tenant.force_login(tenant)
+    as_landlord.force_login(landlord)
+
+    def get(client, url, params=None):
+        def run():
+            response = client.get(url, params or {})
+            assert response.status_code == 200, f'{url} returned {response.status_code}'
+        return run
+
+    def nearest():
+        coords = {
+            pid: (lat, lng)
+            for pid, lat, lng in Property.objects.filter(
+                is_verified=True, latitude__isnull=False, longitude__isnull=False,
+            ).values_list('id', 'latitude', 'longitude')
+        }
+        nearest_properties(ORIGIN, coords, k=10)
+
+    check_in = date.today() + timedelta(days=30)
+    return [
+        ('view:home', get(anonymous, '/listings/')),
+        ('view:home[tenant]', get(as_tenant, '/listings/')),
+        ('view:home[landlord]', get(as_landlord, '/listings/')),
+        ('view:dashboard[tenant]', get(as_tenant, '/users/dashboard/')),
+        ('view:dashboard[landlord]', get(as_landlord, '/users/dashboard/')),
+        ('view:property_list', get(anonymous, '/listings/properties/')),
+        ('view:property_list?city', get(anonymous, '/listings/properties/', {'city': 'Pokhara'})),
+        ('view:property_list?q', get(anonymous, '/listings/properties/', {'q': 'pokhra'})),
+        ('view:property_list?near', get(anonymous, '/listings/properties/', {
+            'lat': ORIGIN[0], 'lng': ORIGIN[1], 'radius_km': 5,
+        })),
+        ('view:property_list?dates', get(anonymous, '/listings/properties/', {
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=30)).isoformat(),
+        })),
+        ('view:property_detail', get(anonymous, f'/listings/property/{prop.pk}/')),
+        ('view:booking_messages', get(as_tenant, f'/listings/booking/{booking.pk}/messages/')),
+        ('view:notifications', get(as_tenant, '/users/notifications/')),
+        ('fn:fuzzy_search_properties', lambda: fuzzy_search_properties('Kathmandu')),
+        ('fn:get_popular_properties', lambda: get_popular_properties(limit=6)),
+        ('fn:get_property_recommendations', lambda: get_property_recommendations(prop, limit=4)),
+        ('fn:nearest_properties', nearest),
+    ]
+
+
+def measure(fn, iterations, warmup, cold):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        fn()
+    timings, queries = [], []
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max_ms': round(timings[-1], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': int(statistics.median(queries)),
+        'iterations': iterations,
+    }
+
+
+def print_report(results, previous=None):
+    header = f"{'path':<34} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'queries':>8}"
+    if previous:
+        header += f" {'p50 vs prev':>12} {'queries vs prev':>16}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        line = f"{name:<34} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['max_ms']:>9.2f} {r['queries']:>8}"
+        old = (previous or {}).get(name)
+        if old:
+            change = (r['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            line += f" {change:>+11.0f}% {r['queries'] - old['queries']:>+16}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--only', nargs='+', metavar='PATH', help='run only paths whose name contains one of these')
+    parser.add_argument('--page-cache', action='store_true', help='leave the anonymous page cache on')
+    parser.add_argument('--cold', action='store_true', help='clear the cache before every iteration')
+    parser.add_argument('--output', help='JSON file to write (default: benchmarks/results/hot_paths-<commit>.json)')
+    parser.add_argument('--compare', help='previous JSON results to compare against')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from listings.fake_data import generate
+
+    if not args.page_cache:
+        settings.ANONYMOUS_PAGE_CACHE_TIMEOUT = 0
+    # keep the slow-request log quiet while measuring
+    settings.PERF_SLOW_REQUEST_MS = settings.PERF_QUERY_COUNT_THRESHOLD = 10 ** 9
+
+    commit = git_commit()
+    with throwaway_database():
+        started = time.perf_counter()
+        counts = generate(seed=args.seed, **SCALES[args.scale])
+        print(f"generated {counts} in {time.perf_counter() - started:.1f}s")
+
+        results = {}
+        for name, fn in hot_paths():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = measure(fn, args.iterations, args.warmup, args.cold)
+        vendor = connection.vendor
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as fh:
+            previous = json.load(fh)['results']
+    print_report(results, previous)
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'hot_paths-{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'scale': args.scale,
+                'seed': args.seed,
+                'counts': counts,
+                'iterations': args.iterations,
+                'warmup': args.warmup,
+                'page_cache': args.page_cache,
+                'cold': args.cold,
+                'database': vendor,
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }, fh, indent=2)
+    print(f"results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Benchmark the request-time cost of accepting property photos: the legacy
+path (``Image.open`` validation, then a full decode and JPEG re-encode in the
+view) vs header-only ``listings.images.validate_upload``.
+
+Usage:
+    python benchmarks/bench_image_upload.py [--photos 4] [--width 4000] [--height 3000] [--repeat 3]
+
+Each mode runs in a fresh subprocess so its peak RSS is its own; the figure
+reported is the peak above the process's RSS once Django and the test photos
+are loaded. Uploads are built the way Django's upload handlers would: kept in
+memory up to the mode's ``FILE_UPLOAD_MAX_MEMORY_SIZE`` (Django's 2.5MB
+default for legacy, the project setting for header), otherwise streamed to
+a temporary file in 64KB chunks.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._django import setup_django  # noqa: E402
+
+LEGACY_MEMORY_LIMIT = 2621440  # Django's default FILE_UPLOAD_MAX_MEMORY_SIZE
+CHUNK = 64 * 1024
+
+
+def make_photos(directory, count, size):
+    """Write ``count`` camera-sized JPEGs (gradient + grain) to ``directory``."""
+    from PIL import Image, ImageFilter
+
+    grain = Image.effect_noise(size, 25).filter(ImageFilter.BoxBlur(1))
+    gradient = Image.linear_gradient('L').resize(size)
+    photo = Image.merge('RGB', (gradient, grain, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'photo_{i}.jpg')
+        photo.rotate(180 * (i % 2)).save(path, format='JPEG', quality=90)
+        paths.append(path)
+    return paths
+
+
+def make_upload(path, memory_limit):
+    from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+
+    size = os.path.getsize(path)
+    name = os.path.basename(path)
+    with open(path, 'rb') as source:
+        if size <= memory_limit:
+            return InMemoryUploadedFile(BytesIO(source.read()), 'images', name, 'image/jpeg', size, None)
+        upload = TemporaryUploadedFile(name, 'image/jpeg', size, None)
+        while chunk := source.read(CHUNK):
+            upload.write(chunk)
+        upload.seek(0)
+        return upload
+
+
+def legacy_accept(upload):
+    """The view code before header-only validation, as a reference."""
+    from PIL import Image
+
+    img = Image.open(upload)
+    width, height = img.size
+    assert 640 <= width <= 4000 and 480 <= height <= 3000
+    img = Image.open(upload)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=90, optimize=True)
+    return output.getbuffer().nbytes
+
+
+def header_accept(upload):
+    from listings.images import validate_upload
+
+    is_valid, error, _ = validate_upload(upload)
+    assert is_valid, error
+    return upload.size
+
+
+def run_mode(mode, paths, repeat):
+    setup_django()  # also imports listings.images, via the app's signals
+    from django.conf import settings
+    from PIL import Image
+
+    accept = legacy_accept if mode == 'legacy' else header_accept
+    memory_limit = LEGACY_MEMORY_LIMIT if mode == 'legacy' else settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    # load the JPEG codec before the baseline so neither mode is charged for it
+    Image.preinit()
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        uploads = [make_upload(path, memory_limit) for path in paths]
+        for upload in uploads:
+            accept(upload)
+        timings.append(time.perf_counter() - started)
+        for upload in uploads:
+            upload.close()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {'seconds': min(timings), 'peak_rss_mb': (peak_kb - baseline_kb) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--photos', type=int, default=4)
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3, help='best of N runs is reported')
+    parser.add_argument('--mode', choices=('legacy', 'header'), help=argparse.SUPPRESS)
+    parser.add_argument('--paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.paths, args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_photos(directory, args.photos, (args.width, args.height))
+        upload_mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+        print(f"{args.photos} photos of {args.width}x{args.height} "
+              f"({args.width * args.height / 1e6:.0f} MP, {upload_mb:.1f}MB total)")
+
+        header = f"{'mode':>8}  {'wall time':>10}  {'peak RSS':>10}"
+        print(header)
+        print('-' * len(header))
+        results = {}
+        for mode in ('legacy', 'header'):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--mode', mode,
+                 '--repeat', str(args.repeat), '--paths', *paths],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>8}  {results[mode]['seconds'] * 1000:8.1f}ms  "
+                  f"{results[mode]['peak_rss_mb']:8.1f}MB")
+
+    speedup = results['legacy']['seconds'] / max(results['header']['seconds'], 1e-9)
+    print(f"header-only validation is {speedup:,.0f}x faster per request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Benchmark nearest-property search: legacy ``dijkstra`` ranking, the linear
+``nearest_properties`` scan and the k-d tree in ``listings.spatial``.
+
+Usage:
+    python benchmarks/bench_nearest.py [--sizes 1000 10000 100000] [--k 10]
+
+The legacy implementation is O(n^2); sizes above ``--legacy-max`` are not run
+and their time is extrapolated quadratically from the largest measured size
+(marked with ``~``). The k-d tree only beats the scan once its build cost is
+shared by many queries over the same points.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listings.spatial import SpatialIndex  # noqa: E402
+from listings.utils import dijkstra, nearest_properties  # noqa: E402
+
+# Rough bounding box around the Kathmandu valley
+LAT_RANGE = (27.60, 27.80)
+LNG_RANGE = (85.20, 85.45)
+
+
+def make_points(n, seed=42):
+    rng = random.Random(seed)
+    return {
+        i: (rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+        for i in range(1, n + 1)
+    }
+
+
+def legacy_nearest(start, points, k):
+    dists = dijkstra(start, points)
+    return sorted(dists, key=lambda pid: dists[pid])[:k]
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=100, help='k-NN queries per size')
+    parser.add_argument('--legacy-max', type=int, default=1000,
+                        help='largest size to run the O(n^2) legacy implementation at')
+    args = parser.parse_args()
+
+    start = (27.7172, 85.3240)
+    rng = random.Random(7)
+    legacy_ref = None  # (n, seconds) of the largest measured legacy run
+
+    header = (f"{'points':>8}  {'legacy':>12}  {'scan':>10}  {'kd build':>10}  {'kd query':>10}  "
+              f"{'scan speedup':>12}")
+    print(header)
+    print('-' * len(header))
+
+    for n in args.sizes:
+        points = make_points(n)
+
+        index, build_s = timed(SpatialIndex, points)
+        queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(args.queries)]
+        t0 = time.perf_counter()
+        for q in queries:
+            index.nearest(q, args.k)
+        query_s = (time.perf_counter() - t0) / len(queries)
+
+        scan_ids, scan_s = timed(nearest_properties, start, points, args.k)
+        kd_ids = [pid for pid, _ in index.nearest(start, args.k)]
+        assert scan_ids == kd_ids, 'k-d tree result differs from the linear scan'
+
+        if n <= args.legacy_max:
+            legacy_ids, legacy_s = timed(legacy_nearest, start, points, args.k)
+            assert legacy_ids == scan_ids, 'linear scan differs from legacy ordering'
+            legacy_ref = (n, legacy_s)
+            legacy_label = f"{legacy_s:11.3f}s"
+        elif legacy_ref:
+            legacy_s = legacy_ref[1] * (n / legacy_ref[0]) ** 2
+            legacy_label = f"~{legacy_s:10.1f}s"
+        else:
+            legacy_s = None
+            legacy_label = f"{'skipped':>12}"
+
+        speedup = f"{legacy_s / scan_s:11.0f}x" if legacy_s else f"{'-':>12}"
+        print(f"{n:>8}  {legacy_label}  {scan_s * 1000:8.2f}ms  {build_s:9.3f}s  {query_s * 1000:8.3f}ms  {speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Benchmark property recommendations: the original per-row Python loop vs the
+single-query pruned scoring in ``listings.recommendations``.
+
+Usage:
+    python benchmarks/bench_recommendations.py [--properties 50000] [--requests 50]
+
+Runs against a throwaway test database, so the development db is untouched.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._django import setup_django, throwaway_database  # noqa: E402
+
+CITIES = ['Kathmandu', 'Lalitpur', 'Bhaktapur', 'Pokhara', 'Biratnagar', 'Chitwan', 'Butwal', 'Dharan']
+
+
+def legacy_recommendations(target, limit=4):
+    """The pre-optimisation implementation, kept here as the baseline."""
+    from listings.models import Property
+
+    recommendations = []
+    for prop in Property.objects.filter(is_verified=True).exclude(id=target.id):
+        score = 0
+        if prop.city.lower() == target.city.lower():
+            score += 40
+        price_diff = abs(float(prop.rent) - float(target.rent))
+        price_range = float(target.rent) * 0.2
+        if price_diff <= price_range:
+            score += max(0, 30 * (1 - price_diff / (price_range + 1)))
+        if prop.bedrooms == target.bedrooms:
+            score += 15
+        if prop.bathrooms == target.bathrooms:
+            score += 15
+        if score >= 20:
+            recommendations.append((prop, score))
+    recommendations.sort(key=lambda x: x[1], reverse=True)
+    return [prop for prop, score in recommendations[:limit]]
+
+
+def populate(n, seed=11):
+    from decimal import Decimal
+    from listings.models import Property
+    from users.models import CustomUser
+
+    rng = random.Random(seed)
+    landlord = CustomUser.objects.create_user(username='bench_landlord', password='x', is_landlord=True)
+    Property.objects.bulk_create(
+        [
+            Property(
+                landlord=landlord,
+                title=f'Bench property {i}',
+                description='',
+                city=rng.choice(CITIES),
+                rent=Decimal(rng.randrange(500000, 8000000)) / 100,
+                bedrooms=rng.randint(1, 5),
+                bathrooms=rng.randint(1, 3),
+                address=f'{i} Bench Road',
+                is_verified=rng.random() < 0.9,
+            )
+            for i in range(n)
+        ],
+        batch_size=2000,
+    )
+
+
+def measure(fn, targets):
+    samples = []
+    results = []
+    for target in targets:
+        t0 = time.perf_counter()
+        results.append([p.id for p in fn(target, 4)])
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return results, {
+        'p50_ms': statistics.median(samples) * 1000,
+        'p95_ms': samples[int(len(samples) * 0.95) - 1] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--properties', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--legacy-requests', type=int, default=5,
+                        help='legacy requests to time (each one scans the full catalogue)')
+    args = parser.parse_args()
+
+    setup_django()
+    from listings.models import Property
+    from listings.recommendations import recommend_similar
+
+    with throwaway_database():
+        populate(args.properties)
+        rng = random.Random(5)
+        ids = list(Property.objects.filter(is_verified=True).values_list('id', flat=True))
+        targets = list(Property.objects.filter(id__in=rng.sample(ids, args.requests)))
+
+        new_results, new_stats = measure(recommend_similar, targets)
+        legacy_targets = targets[:args.legacy_requests]
+        legacy_results, legacy_stats = measure(legacy_recommendations, legacy_targets)
+
+        mismatches = sum(1 for a, b in zip(new_results, legacy_results) if a != b)
+        print(f"{args.properties} properties, {len(targets)} requests "
+              f"({len(legacy_targets)} legacy), result mismatches: {mismatches}")
+        print(f"{'implementation':<16}{'p50':>10}{'p95':>10}{'max':>10}")
+        for name, stats in (('legacy loop', legacy_stats), ('single query', new_stats)):
+            print(f"{name:<16}{stats['p50_ms']:>8.1f}ms{stats['p95_ms']:>8.1f}ms{stats['max_ms']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
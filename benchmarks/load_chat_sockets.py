@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Load test for booking chat: hundreds of concurrent WebSocket clients sending
+messages through ``BookingMessageConsumer``.
+
+Every socket is a booking participant (tenant or landlord). Each sender
+fires ``--messages`` messages and the script measures the time until
+every other socket in the room has received each broadcast. It also reports
+how many ``bulk_create`` flushes the write-behind buffer used, and checks
+that every message was persisted exactly once.
+
+Usage:
+    python benchmarks/load_chat_sockets.py [--sockets 400] [--bookings 50] [--messages 5] [--redis]
+
+By default the in-memory channel layer is used. Pass ``--redis`` to go
+through the configured CHANNEL_LAYERS (a running Redis is required). Runs
+against a throwaway test database, so the development db is untouched.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks._django import setup_django, throwaway_database  # noqa: E402
+
+
+def populate(bookings):
+    from datetime import timedelta
+    from django.utils import timezone
+    from listings.models import Booking, Property
+    from users.models import CustomUser
+
+    start = timezone.now().date() + timedelta(days=7)
+    rooms = []
+    for i in range(bookings):
+        landlord = CustomUser.objects.create_user(username=f'load_landlord_{i}', password='x', is_landlord=True)
+        tenant = CustomUser.objects.create_user(username=f'load_tenant_{i}', password='x', is_tenant=True)
+        prop = Property.objects.create(
+            landlord=landlord, title=f'Load {i}', description='', city='Kathmandu',
+            rent='10000', bedrooms=1, bathrooms=1, address='-', is_verified=True,
+        )
+        booking = Booking.objects.create(
+            tenant=tenant, property=prop, start_date=start, end_date=start + timedelta(days=30),
+        )
+        rooms.append((booking.pk, (tenant, landlord)))
+    return rooms
+
+
+async def run(rooms, sockets, messages):
+    from channels.testing import WebsocketCommunicator
+    from listings.message_buffer import message_buffer
+    from rentalConnect.routing import websocket_urlpatterns
+    from channels.routing import URLRouter
+
+    application = URLRouter(websocket_urlpatterns)
+
+    flushes = 0
+    original_write = message_buffer._write
+
+    def counting_write(batch):
+        nonlocal flushes
+        flushes += 1
+        original_write(batch)
+
+    message_buffer._write = counting_write
+
+    clients = []  # (booking_id, communicator)
+    for i in range(sockets):
+        booking_id, participants = rooms[i % len(rooms)]
+        communicator = WebsocketCommunicator(application, f'/ws/booking/{booking_id}/messages/')
+        communicator.scope['user'] = participants[(i // len(rooms)) % 2]
+        connected, _ = await communicator.connect()
+        if not connected:
+            raise SystemExit(f'socket {i} was rejected')
+        clients.append((booking_id, communicator))
+
+    room_sizes = {}
+    for booking_id, _ in clients:
+        room_sizes[booking_id] = room_sizes.get(booking_id, 0) + 1
+
+    sent_at = {}
+    latencies = []
+
+    async def sender(communicator):
+        for _ in range(messages):
+            client_id = str(uuid.uuid4())
+            sent_at[client_id] = time.perf_counter()
+            await communicator.send_json_to({'type': 'send_message', 'content': 'load', 'client_id': client_id})
+
+    async def receiver(booking_id, communicator):
+        # every socket sees every message sent in its room, its own included
+        for _ in range(room_sizes[booking_id] * messages):
+            event = await communicator.receive_json_from(timeout=30)
+            latencies.append(time.perf_counter() - sent_at[event['message']['client_id']])
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(sender(c) for _, c in clients),
+        *(receiver(b, c) for b, c in clients),
+    )
+    broadcast_elapsed = time.perf_counter() - started
+    await message_buffer.flush()
+    for _, communicator in clients:
+        await communicator.disconnect()
+    message_buffer._write = original_write
+    return latencies, broadcast_elapsed, flushes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sockets', type=int, default=400)
+    parser.add_argument('--bookings', type=int, default=50)
+    parser.add_argument('--messages', type=int, default=5)
+    parser.add_argument('--redis', action='store_true', help='use the configured channel layer')
+    args = parser.parse_args()
+
+    setup_django()
+    if not args.redis:
+        from django.conf import settings
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+    from asgiref.sync import async_to_sync
+    from listings.models import BookingMessage
+
+    with throwaway_database():
+        rooms = populate(args.bookings)
+        latencies, elapsed, flushes = async_to_sync(run)(rooms, args.sockets, args.messages)
+        sent = args.sockets * args.messages
+        stored = BookingMessage.objects.count()
+        distinct = BookingMessage.objects.values('client_id').distinct().count()
+
+    latencies.sort()
+    print(f"sockets={args.sockets} rooms={args.bookings} messages sent={sent}")
+    print(f"deliveries={len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f}/s)")
+    print(
+        "broadcast latency ms: "
+        f"p50={statistics.median(latencies) * 1000:.1f} "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} "
+        f"max={latencies[-1] * 1000:.1f}"
+    )
+    print(f"bulk_create flushes={flushes} (avg {sent / max(flushes, 1):.1f} messages each)")
+    print(f"rows stored={stored} distinct client ids={distinct}")
+    if stored != sent or distinct != sent:
+        raise SystemExit("persisted rows do not match messages sent")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Booking access checks shared by the chat consumer and the booking,
+early-exit and payment views.
+
+``booking_participants`` resolves a booking's (tenant_id, landlord_id) with
+a single ``values_list`` query and caches the pair for
+``BOOKING_ACCESS_TIMEOUT`` seconds, so repeated checks (page loads, chat
+reconnect storms) neither hit the database nor traverse lazy foreign keys.
+A booking's tenant never changes; a property changing landlord is picked up
+when the short TTL expires, and deleted bookings are dropped by
+``listings.signals``.
+"""
+from django.core.cache import cache
+
+BOOKING_ACCESS_TIMEOUT = 60
+
+
+def _cache_key(booking_id):
+    return f'booking-participants:{booking_id}'
+
+
+def invalidate_booking_participants(*booking_ids):
+    cache.delete_many([_cache_key(booking_id) for booking_id in booking_ids])
+
+
+def booking_participants(booking_id):
+    """(tenant_id, landlord_id) for the booking, or None if it does not exist."""
+    from .models import Booking
+
+    key = _cache_key(booking_id)
+    participants = cache.get(key)
+    if participants is None:
+        participants = Booking.objects.filter(pk=booking_id).values_list(
+            'tenant_id', 'property__landlord_id'
+        ).first()
+        if participants is None:
+            return None
+        cache.set(key, participants, BOOKING_ACCESS_TIMEOUT)
+    return participants
+
+
+def booking_role(user, booking_id):
+    """'tenant', 'landlord' or None for ``user`` on the booking."""
+    if not user.is_authenticated:
+        return None
+    participants = booking_participants(booking_id)
+    if participants is None:
+        return None
+    tenant_id, landlord_id = participants
+    if user.pk == tenant_id:
+        return 'tenant'
+    if user.pk == landlord_id:
+        return 'landlord'
+    return None
+
+
+def is_booking_participant(user, booking_id):
+    return booking_role(user, booking_id) is not None
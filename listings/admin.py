@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.utils import timezone
+
 from .models import (
     Property,
     Booking,
@@ -11,8 +13,12 @@ from .models import (
     InspectionImage,
     PropertyImage,
     PropertyAppointment,
+    OutboundEmail,
 )
+from .outbox import requeue
+from .signals import properties_bulk_updated
 from users.models import Notification
+from users.notifications import send_notifications
 
 
 class PropertyImageInline(admin.TabularInline):
@@ -47,41 +53,45 @@ class PropertyVerificationRequestAdmin(admin.ModelAdmin):
     actions = ['approve_requests', 'reject_requests']
 
     def approve_requests(self, request, queryset):
-        for vr in queryset:
-            vr.status = 'approved'
-            vr.reviewed_by = request.user
-            vr.save(update_fields=['status', 'reviewed_by', 'updated_at'])
-
-            # Mark property as verified
-            prop = vr.property
-            if not prop.is_verified:
-                prop.is_verified = True
-                prop.save(update_fields=['is_verified'])
-
-            Notification.objects.create(
-                recipient=prop.landlord,
+        requests = list(queryset.select_related('property'))
+        PropertyVerificationRequest.objects.filter(pk__in=[vr.pk for vr in requests]).update(
+            status='approved', reviewed_by=request.user, updated_at=timezone.now(),
+        )
+
+        # Mark properties as verified
+        property_ids = {vr.property_id for vr in requests if not vr.property.is_verified}
+        Property.objects.filter(pk__in=property_ids).update(is_verified=True)
+        properties_bulk_updated(property_ids)
+
+        send_notifications([
+            Notification(
+                recipient_id=vr.property.landlord_id,
                 actor=request.user,
                 title="Property verified",
-                message=f"Your property '{prop.title}' has been verified and is now visible to tenants.",
+                message=f"Your property '{vr.property.title}' has been verified and is now visible to tenants.",
                 target_url="/#dashboard",
             )
+            for vr in requests
+        ])
 
     approve_requests.short_description = "Approve selected verification requests"
 
     def reject_requests(self, request, queryset):
-        for vr in queryset:
-            vr.status = 'rejected'
-            vr.reviewed_by = request.user
-            vr.save(update_fields=['status', 'reviewed_by', 'updated_at'])
-
-            prop = vr.property
-            Notification.objects.create(
-                recipient=prop.landlord,
+        requests = list(queryset.select_related('property'))
+        PropertyVerificationRequest.objects.filter(pk__in=[vr.pk for vr in requests]).update(
+            status='rejected', reviewed_by=request.user, updated_at=timezone.now(),
+        )
+
+        send_notifications([
+            Notification(
+                recipient_id=vr.property.landlord_id,
                 actor=request.user,
                 title="Verification rejected",
-                message=f"Verification for '{prop.title}' was rejected. Please review requirements and resubmit.",
+                message=f"Verification for '{vr.property.title}' was rejected. Please review requirements and resubmit.",
                 target_url="/#dashboard",
             )
+            for vr in requests
+        ])
 
     reject_requests.short_description = "Reject selected verification requests"
 
@@ -151,4 +161,19 @@ class PropertyAppointmentAdmin(admin.ModelAdmin):
     list_display = ('property', 'tenant', 'appointment_date', 'appointment_time', 'status', 'created_at')
     list_filter = ('status', 'appointment_date')
     search_fields = ('property__title', 'tenant__username')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to', 'last_error')
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'last_error')
+    actions = ['requeue_emails']
+
+    def requeue_emails(self, request, queryset):
+        count = requeue(queryset.exclude(status='sent'))
+        self.message_user(request, f"Requeued {count} email(s).")
+
+    requeue_emails.short_description = "Requeue selected unsent emails"
@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib import messages
 from django.db.models import Count, Q
@@ -8,13 +9,35 @@ from .models import (
     Property, Booking, PropertyVerificationRequest,
     EarlyExitRequest, Settlement, BookingMessage
 )
-from users.models import CustomUser, Notification
+from .outbox import queue_stats
+from .page_cache import cache_stats
+from .perf import view_report
+from users.models import CustomUser
+from users.notifications import notify
 
 
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
 
+@user_passes_test(is_admin)
+def admin_cache_stats(request):
+    """Hit/miss counters of the catalogue page and fragment caches, for monitoring."""
+    return JsonResponse(cache_stats())
+
+
+@user_passes_test(is_admin)
+def admin_perf(request):
+    """Per-view request timings, query counts and wall-time histograms."""
+    return JsonResponse({'views': view_report()})
+
+
+@user_passes_test(is_admin)
+def admin_email_queue(request):
+    """Outbound email queue depth, dead letters and delivery latency."""
+    return JsonResponse(queue_stats())
+
+
 @user_passes_test(is_admin)
 def admin_dashboard(request):
     """Custom admin dashboard with key metrics and actions."""
@@ -223,7 +246,7 @@ def verify_property(request, verification_id):
     verification.save()
 
     # Create notification for property owner
-    Notification.objects.create(
+    notify(
         recipient=verification.submitted_by,
         title='Property Verification Update',
         message=f"Your property '{verification.property.title}' verification has been {verification.status}.",
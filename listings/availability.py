@@ -0,0 +1,88 @@
+"""
+Booking availability engine.
+
+All overlap checks go through this module and are served by the composite
+``Booking(property, status, start_date, end_date)`` index:
+
+- ``overlapping_bookings`` / ``is_available``: single-property checks
+- ``check_and_reserve``: the one entry point for creating a booking; the
+  overlap test and the insert run in one transaction while holding a lock
+  on the property row, so concurrent requests cannot double-book
+- ``available_properties``: bulk "free between X and Y" filter expressed as
+  a single NOT EXISTS anti-join
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+# Bookings in these states hold their dates
+BLOCKING_STATUSES = ('pending', 'approved', 'rented_out')
+
+CONFLICT_MESSAGE = "This property is already booked for the selected dates."
+
+
+def overlapping_bookings(property_id, start_date, end_date, exclude_id=None):
+    """Blocking bookings on ``property_id`` that overlap [start_date, end_date)."""
+    from .models import Booking
+
+    conflicts = Booking.objects.filter(
+        property_id=property_id,
+        status__in=BLOCKING_STATUSES,
+        start_date__lt=end_date,
+        end_date__gt=start_date,
+    )
+    if exclude_id:
+        conflicts = conflicts.exclude(pk=exclude_id)
+    return conflicts
+
+
+def is_available(property_id, start_date, end_date, exclude_id=None):
+    return not overlapping_bookings(property_id, start_date, end_date, exclude_id).exists()
+
+
+def check_and_reserve(property, tenant, start_date, end_date, **fields):
+    """
+    Create a Booking for ``tenant`` if the dates are free.
+
+    The property row is locked (SELECT ... FOR UPDATE) for the duration of
+    the transaction so two concurrent reservations for the same property are
+    serialised; on SQLite, where row locks are not supported, the database
+    write lock provides the same guarantee. Raises ValidationError when the
+    dates are invalid or already taken.
+    """
+    from .models import Booking, Property
+
+    booking = Booking(
+        property=property,
+        tenant=tenant,
+        start_date=start_date,
+        end_date=end_date,
+        **fields,
+    )
+    booking.clean_fields()
+    booking.validate_dates()
+
+    with transaction.atomic():
+        Property.objects.select_for_update().filter(pk=property.pk).values_list('pk').first()
+        if not is_available(property.pk, start_date, end_date):
+            raise ValidationError(CONFLICT_MESSAGE)
+        booking.save(check_conflicts=False)
+    return booking
+
+
+def available_properties(start_date, end_date, queryset=None):
+    """Filter ``queryset`` (default: all properties) to those free for the whole range."""
+    from .models import Booking, Property
+
+    if queryset is None:
+        queryset = Property.objects.all()
+    return queryset.filter(
+        ~Exists(
+            Booking.objects.filter(
+                property=OuterRef('pk'),
+                status__in=BLOCKING_STATUSES,
+                start_date__lt=end_date,
+                end_date__gt=start_date,
+            )
+        )
+    )
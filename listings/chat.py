@@ -0,0 +1,84 @@
+"""
+Booking chat history.
+
+Pages are read newest-first through the ``BookingMessage(booking,
+created_at)`` index with keyset pagination: the cursor encodes the
+(created_at, id) of the oldest message already shown, so fetching an older
+page costs the same however long the thread is. Senders are joined in the
+same query.
+
+``messages_since`` lets a reconnecting WebSocket client fetch only the
+messages it missed.
+"""
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+HISTORY_PAGE_SIZE = 30
+MAX_HISTORY_PAGE_SIZE = 100
+RESYNC_LIMIT = 200
+
+
+def _messages(booking_id):
+    from .models import BookingMessage
+
+    return BookingMessage.objects.filter(booking_id=booking_id).select_related('sender').only(
+        'id', 'client_id', 'content', 'created_at', 'is_read', 'booking_id',
+        'sender__id', 'sender__username', 'sender__first_name',
+    )
+
+
+def encode_cursor(message):
+    raw = f"{message.created_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from ``cursor``; None when it is malformed."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def history_page(booking_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Up to ``limit`` messages older than ``cursor`` (the latest ones when it is
+    None), oldest first, and the cursor for the next older page (None when
+    there are no more).
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    qs = _messages(booking_id)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    rows = list(qs.order_by('-created_at', '-pk')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    return rows, (encode_cursor(rows[0]) if has_more else None)
+
+
+def messages_since(booking_id, since_id, limit=RESYNC_LIMIT):
+    """Messages stored after message ``since_id``, oldest first."""
+    return list(_messages(booking_id).filter(pk__gt=since_id).order_by('pk')[:limit])
+
+
+def serialize_message(message):
+    return {
+        'id': message.pk,
+        'client_id': str(message.client_id) if message.client_id else None,
+        'sender': message.sender.username,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+        'is_read': message.is_read,
+    }
@@ -1,30 +1,65 @@
 import json
+import uuid
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-from .models import Booking, BookingMessage
+from django.utils import timezone
 
-User = get_user_model()
+from .access import booking_participants
+from .chat import messages_since, serialize_message
+from .message_buffer import message_buffer, read_receipts
+from .models import BookingMessage
 
 
 class BookingMessageConsumer(AsyncWebsocketConsumer):
+    """
+    Booking chat room.
+
+    The booking's participants are resolved once in ``connect``; messages
+    are broadcast to the room immediately and persisted asynchronously by
+    ``listings.message_buffer``, which acknowledges each one to its sender
+    (``{"type": "ack", "client_id": ...}``) once it is stored (see there for
+    the delivery guarantees).
+    """
+
     async def connect(self):
-        self.booking_id = self.scope['url_route']['kwargs']['booking_id']
+        self.booking_id = int(self.scope['url_route']['kwargs']['booking_id'])
         self.room_group_name = f'booking_{self.booking_id}'
+        self.participant_ids = await self.get_participant_ids()
 
         # Check if user has permission to access this booking
-        if await self.can_access_booking():
+        user = self.scope['user']
+        if user.is_authenticated and user.pk in self.participant_ids:
             await self.channel_layer.group_add(
                 self.room_group_name,
                 self.channel_name
             )
             await self.accept()
+            await self.send_missed_messages()
+        else:
+            await self.close()
+
+    async def send_missed_messages(self):
+        """On reconnect (``?since_id=<last seen id>``) replay what the client missed."""
+        since_id = parse_qs(self.scope.get('query_string', b'').decode()).get('since_id', [''])[0]
+        if not since_id.isdigit():
+            return
+        # make this process's pending messages visible to the query
+        await message_buffer.flush()
+        missed = await self.get_messages_since(int(since_id))
+        await self.send(text_data=json.dumps({
+            'type': 'history',
+            'messages': missed,
+        }))
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        await message_buffer.flush()
+        await read_receipts.flush()
 
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -32,6 +67,8 @@ class BookingMessageConsumer(AsyncWebsocketConsumer):
 
         if message_type == 'send_message':
             await self.handle_send_message(data)
+        elif message_type == 'mark_read':
+            await self.handle_mark_read(data)
 
     async def handle_send_message(self, data):
         content = data.get('content', '').strip()
@@ -42,16 +79,25 @@ class BookingMessageConsumer(AsyncWebsocketConsumer):
         if not user.is_authenticated:
             return
 
-        # Save message to database
-        message = await self.save_message(user, content)
+        message = BookingMessage(
+            booking_id=self.booking_id,
+            sender_id=user.pk,
+            content=content,
+            client_id=self.parse_client_id(data.get('client_id')),
+            created_at=timezone.now(),
+        )
+        # where the buffer sends the ack once the row is committed
+        message._reply_channel = self.channel_name
 
-        # Send message to room group
+        # Broadcast first; the database write happens behind it
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
                 'message': {
-                    'id': message.id,
+                    # the row id is only known once the buffer flushes
+                    'id': None,
+                    'client_id': str(message.client_id),
                     'sender': user.username,
                     'content': content,
                     'created_at': message.created_at.isoformat(),
@@ -59,6 +105,38 @@ class BookingMessageConsumer(AsyncWebsocketConsumer):
                 }
             }
         )
+        await message_buffer.add(message)
+
+    async def handle_mark_read(self, data):
+        """
+        ``{"type": "mark_read", "up_to_id": <id>, "client_id": <uuid>}``: the
+        client has read everything up to that message. Coalesced and applied
+        by ``read_receipts``.
+        """
+        up_to_id = data.get('up_to_id')
+        if not isinstance(up_to_id, int) or up_to_id < 0:
+            up_to_id = None
+        client_id = None
+        if data.get('client_id'):
+            try:
+                client_id = uuid.UUID(str(data['client_id']))
+            except ValueError:
+                pass
+        if up_to_id or client_id:
+            await read_receipts.mark(self.booking_id, self.scope['user'].pk, up_to_id, client_id)
+
+    async def read_receipt(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'read_receipt',
+            'reader_id': event['reader_id'],
+            'up_to_id': event['up_to_id'],
+        }))
+
+    async def message_ack(self, event):
+        await self.send(text_data=json.dumps({'type': 'ack', 'client_id': event['client_id']}))
+
+    async def message_rejected(self, event):
+        await self.send(text_data=json.dumps({'type': 'rejected', 'client_id': event['client_id']}))
 
     async def chat_message(self, event):
         message = event['message']
@@ -69,23 +147,17 @@ class BookingMessageConsumer(AsyncWebsocketConsumer):
             'message': message
         }))
 
-    @database_sync_to_async
-    def can_access_booking(self):
+    @staticmethod
+    def parse_client_id(value):
         try:
-            user = self.scope['user']
-            if not user.is_authenticated:
-                return False
+            return uuid.UUID(str(value))
+        except ValueError:
+            return uuid.uuid4()
 
-            booking = Booking.objects.get(id=self.booking_id)
-            return booking.tenant == user or booking.property.landlord == user
-        except Booking.DoesNotExist:
-            return False
+    @database_sync_to_async
+    def get_messages_since(self, since_id):
+        return [serialize_message(m) for m in messages_since(self.booking_id, since_id)]
 
     @database_sync_to_async
-    def save_message(self, user, content):
-        booking = Booking.objects.get(id=self.booking_id)
-        return BookingMessage.objects.create(
-            booking=booking,
-            sender=user,
-            content=content
-        )
\ No newline at end of file
+    def get_participant_ids(self):
+        return frozenset(booking_participants(self.booking_id) or ())
@@ -0,0 +1,235 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+``generate()`` bulk-creates landlords and tenants, properties spread around
+Nepali cities (weighted roughly by population, with coordinates scattered
+a few km around each centre), non-overlapping bookings per property, chat
+messages and notifications. The same ``seed`` always produces the same
+data, so benchmark runs on different commits measure the same workload.
+
+Rows are written with ``bulk_create``, which skips ``save()`` and the
+post_save receivers, so the derived data those maintain (phonetic keys,
+popularity scores, cover images, search index, caches) is filled in
+explicitly afterwards through ``properties_bulk_updated``.
+
+Generated usernames start with ``prefix``; ``clear()`` removes everything
+created under it.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULT_PREFIX = 'fake_'
+FAKE_PASSWORD = 'fake-password'
+BATCH_SIZE = 500
+
+# (city, latitude, longitude, weight, typical monthly rent for 1 bedroom)
+CITIES = (
+    ('Kathmandu', 27.7172, 85.3240, 30, 15000),
+    ('Lalitpur', 27.6644, 85.3188, 12, 14000),
+    ('Bhaktapur', 27.6710, 85.4298, 6, 11000),
+    ('Pokhara', 28.2096, 83.9856, 12, 12000),
+    ('Biratnagar', 26.4525, 87.2718, 8, 9000),
+    ('Bharatpur', 27.6766, 84.4354, 7, 9000),
+    ('Birgunj', 27.0104, 84.8770, 6, 8500),
+    ('Butwal', 27.7006, 83.4483, 5, 8500),
+    ('Dharan', 26.8065, 87.2846, 5, 8000),
+    ('Nepalgunj', 28.0500, 81.6167, 4, 7500),
+    ('Hetauda', 27.4287, 85.0322, 3, 7500),
+    ('Dhangadhi', 28.6940, 80.5930, 2, 7000),
+)
+NEIGHBOURHOODS = (
+    'Baneshwor', 'Thamel', 'Jawalakhel', 'Kupondole', 'Lakeside', 'Chabahil',
+    'Maharajgunj', 'Sanepa', 'Koteshwor', 'Balaju', 'Kalanki', 'Budhanilkantha',
+)
+KINDS = ('Flat', 'Apartment', 'Room', 'House', 'Studio', 'Penthouse')
+FEATURES = (
+    'with parking', 'near the ring road', 'with mountain view', 'with solar water heater',
+    'close to the bus park', 'with rooftop access', 'in a quiet lane', 'with 24h water supply',
+)
+MESSAGES = (
+    'Is the flat still available?', 'Can I visit this weekend?', 'Is parking included?',
+    'The rent includes water and electricity.', 'Please bring your citizenship copy.',
+    'Sure, come at 4pm.', 'Is the deposit negotiable?', 'Thank you!',
+)
+BOOKING_STATUSES = (
+    ('pending', 20), ('approved', 25), ('rented_out', 20), ('completed', 20),
+    ('rejected', 10), ('cancelled', 5),
+)
+SCATTER_KM = 6
+
+
+def _batched(objects, model):
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _users(rng, prefix, role, count, password):
+    from users.models import CustomUser
+
+    first_names = ('Aarav', 'Sita', 'Bikash', 'Anjali', 'Suman', 'Priya', 'Ramesh', 'Kabita', 'Nabin', 'Asmita')
+    users = [
+        CustomUser(
+            username=f'{prefix}{role}_{i}',
+            email=f'{prefix}{role}_{i}@example.com',
+            first_name=rng.choice(first_names),
+            password=password,
+            is_tenant=role == 'tenant',
+            is_landlord=role == 'landlord',
+        )
+        for i in range(count)
+    ]
+    _batched(users, CustomUser)
+    return list(CustomUser.objects.filter(username__startswith=f'{prefix}{role}_').order_by('pk'))
+
+
+def _properties(rng, landlords, count, now):
+    from .models import Property
+
+    weights = [city[3] for city in CITIES]
+    properties = []
+    for i in range(count):
+        city, lat, lng, _, base_rent = rng.choices(CITIES, weights)[0]
+        bedrooms = rng.choices((1, 2, 3, 4, 5), (30, 35, 20, 10, 5))[0]
+        # ~1km = 0.009 degrees
+        lat += rng.gauss(0, SCATTER_KM * 0.009 / 2)
+        lng += rng.gauss(0, SCATTER_KM * 0.009 / 2)
+        neighbourhood = rng.choice(NEIGHBOURHOODS)
+        prop = Property(
+            landlord=rng.choice(landlords),
+            title=f'{bedrooms}BHK {rng.choice(KINDS)} in {neighbourhood} {rng.choice(FEATURES)}',
+            description=(
+                f'{rng.choice(KINDS)} with {bedrooms} bedroom(s) in {neighbourhood}, {city}. '
+                f'{rng.choice(FEATURES).capitalize()} and {rng.choice(FEATURES)}.'
+            ),
+            city=city,
+            rent=round(base_rent * bedrooms * rng.uniform(0.8, 1.3), -2),
+            bedrooms=bedrooms,
+            bathrooms=max(1, bedrooms - rng.randint(0, 2)),
+            address=f'{neighbourhood}-{rng.randint(1, 35)}, {city}',
+            latitude=round(lat, 6),
+            longitude=round(lng, 6),
+            is_verified=rng.random() < 0.85,
+        )
+        prop.compute_phonetic_keys()
+        properties.append(prop)
+    _batched(properties, Property)
+
+    properties = list(Property.objects.filter(landlord__in=landlords).order_by('pk'))
+    # spread listing dates over four months; auto_now_add ignores them on insert
+    for prop in properties:
+        prop.created_at = now - timedelta(days=rng.uniform(0, 120))
+    Property.objects.bulk_update(properties, ['created_at'], batch_size=BATCH_SIZE)
+    return properties
+
+
+def _bookings(rng, tenants, properties, count, today):
+    from .models import Booking
+
+    statuses, weights = zip(*BOOKING_STATUSES)
+    next_free = {}
+    bookings = []
+    for _ in range(count):
+        prop = rng.choice(properties)
+        # back to back stays per property, so availability queries see realistic gaps
+        start = next_free.get(prop.pk, today - timedelta(days=rng.randint(30, 365)))
+        start += timedelta(days=rng.randint(0, 20))
+        end = start + timedelta(days=rng.choice((30, 60, 90, 180)))
+        next_free[prop.pk] = end + timedelta(days=1)
+        bookings.append(Booking(
+            tenant=rng.choice(tenants),
+            property=prop,
+            start_date=start,
+            end_date=end,
+            monthly_rent=prop.rent,
+            status=rng.choices(statuses, weights)[0],
+        ))
+    _batched(bookings, Booking)
+    return list(
+        Booking.objects.filter(property__in=properties).select_related('property').order_by('pk')
+    )
+
+
+def _messages(rng, bookings, per_booking):
+    from .models import BookingMessage
+
+    messages = []
+    for booking in bookings:
+        participants = (booking.tenant_id, booking.property.landlord_id)
+        for i in range(rng.randint(0, per_booking * 2)):
+            messages.append(BookingMessage(
+                booking=booking,
+                sender_id=participants[i % 2],
+                content=rng.choice(MESSAGES),
+                is_read=rng.random() < 0.7,
+            ))
+    _batched(messages, BookingMessage)
+    return len(messages)
+
+
+def _notifications(rng, users, per_user):
+    from users.models import Notification
+
+    titles = ('New booking request', 'Booking approved', 'New message', 'Property verified', 'Payment received')
+    notifications = [
+        Notification(
+            recipient=user,
+            title=rng.choice(titles),
+            message=rng.choice(MESSAGES),
+            target_url='/dashboard/',
+            is_read=rng.random() < 0.6,
+        )
+        for user in users
+        for _ in range(rng.randint(0, per_user * 2))
+    ]
+    _batched(notifications, Notification)
+    return len(notifications)
+
+
+def generate(landlords=20, tenants=100, properties=500, bookings=1000, messages_per_booking=4,
+             notifications_per_user=5, seed=42, prefix=DEFAULT_PREFIX):
+    """
+    Create a synthetic dataset; ``messages_per_booking`` and
+    ``notifications_per_user`` are averages. Returns the created row counts.
+    """
+    from users.notifications import invalidate_notification_summary
+    from .signals import properties_bulk_updated
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    # one hash for everyone: PBKDF2 per user would dominate the run
+    password = make_password(FAKE_PASSWORD)
+
+    with transaction.atomic():
+        landlord_rows = _users(rng, prefix, 'landlord', landlords, password)
+        tenant_rows = _users(rng, prefix, 'tenant', tenants, password)
+        property_rows = _properties(rng, landlord_rows, properties, now)
+        booking_rows = _bookings(rng, tenant_rows, property_rows, bookings, now.date()) if property_rows else []
+        message_count = _messages(rng, booking_rows, messages_per_booking)
+        notification_count = _notifications(rng, landlord_rows + tenant_rows, notifications_per_user)
+
+        property_ids = [prop.pk for prop in property_rows]
+        for start in range(0, len(property_ids), BATCH_SIZE):
+            properties_bulk_updated(property_ids[start:start + BATCH_SIZE])
+    invalidate_notification_summary(*[user.pk for user in landlord_rows + tenant_rows])
+
+    return {
+        'landlords': len(landlord_rows),
+        'tenants': len(tenant_rows),
+        'properties': len(property_rows),
+        'bookings': len(booking_rows),
+        'messages': message_count,
+        'notifications': notification_count,
+    }
+
+
+def clear(prefix=DEFAULT_PREFIX):
+    """Delete every user created with ``prefix`` and, by cascade, their data."""
+    from users.models import CustomUser
+    from .page_cache import bump_catalogue_version
+
+    deleted, _ = CustomUser.objects.filter(username__startswith=prefix).delete()
+    bump_catalogue_version()
+    return deleted
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Property, Booking, PropertyVerificationRequest, PropertyImage, PropertyAppointment
+from .models import Property, PropertyVerificationRequest, PropertyImage, PropertyAppointment
 from datetime import date
 
 
@@ -60,21 +60,9 @@ class BookingForm(forms.Form):
                 raise forms.ValidationError(
                     "End date must be after start date."
                 )
-            
-            # Check for DATE OVERLAPS, not just existence
-            if self.tenant and self.property:
-                conflicts = Booking.objects.filter(
-                    property=self.property,
-                    status__in=['approved', 'pending'],
-                    start_date__lt=end,
-                    end_date__gt=start
-                )
-                    
-                if conflicts.exists():
-                    raise forms.ValidationError(
-                        "This property is already booked for the selected dates."
-                    )
 
+        # Date overlaps are checked once, atomically with the insert, by
+        # listings.availability.check_and_reserve.
         return cleaned_data
 
 
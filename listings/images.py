@@ -0,0 +1,378 @@
+"""
+Background processing of property photos.
+
+Uploads are stored untouched and queued; the request never decodes or
+re-encodes them. Renditions are produced off the request path:
+
+    thumb   320x240    list thumbnails
+    card    800x600    property cards
+    full   1920x1440   detail page
+
+each as WebP plus a JPEG fallback, and recorded on the image row:
+
+    PropertyImage.renditions = {
+        "card": {"width": 800, "height": 533,
+                 "webp": "property_images/renditions/12/card-3f2a9c0d41be.webp",
+                 "jpeg": "property_images/renditions/12/card-8be0417cd2f3.jpg"},
+        ...
+    }
+
+Decoding and encoding are CPU-bound and run in a process pool
+(``IMAGE_PROCESSING_WORKERS`` processes); a thread pool of the same size
+does the storage reads/writes and database updates around them. Work is
+dispatched once the uploading transaction commits. With
+``IMAGE_PROCESSING_SYNC`` it runs inline instead. Images left pending by a
+restart are picked up by the ``process_pending_images`` management command;
+``warm_thumbnails`` renders every image missing renditions in parallel. File names carry a hash of
+their content, so they never change in place and can be cached forever.
+Templates request them through ``{% card_image %}`` (listings.templatetags),
+which serves the original upload until the renditions are ready; requests
+never render renditions themselves.
+
+Uploads are validated from their header alone (``validate_upload``): at most
+``HEADER_READ_LIMIT`` bytes are read to learn the format and dimensions, so
+the request never decodes pixels or holds a whole photo in memory. Large
+uploads are spooled to Django's temporary file (``FILE_UPLOAD_MAX_MEMORY_SIZE``)
+and the single full decode happens in ``render_renditions``.
+"""
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .page_cache import bump_catalogue_version
+
+# largest first: each rendition is downscaled from the previous one
+RENDITION_SIZES = (
+    ('full', (1920, 1440)),
+    ('card', (800, 600)),
+    ('thumb', (320, 240)),
+)
+RENDITION_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'progressive': True}),
+)
+RENDITION_DIR = 'property_images/renditions'
+
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+ALLOWED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF')
+MIN_DIMENSIONS = (640, 480)
+MAX_DIMENSIONS = (4000, 3000)
+# enough for the JPEG/PNG headers including large EXIF/ICC segments
+HEADER_READ_LIMIT = 256 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# UPLOAD VALIDATION (request)
+# =========================
+def read_image_header(upload, limit=HEADER_READ_LIMIT):
+    """
+    (format, width, height) parsed from the first ``limit`` bytes of
+    ``upload``, which is rewound afterwards. Raises ``ValueError`` when the
+    header cannot be parsed.
+    """
+    upload.seek(0)
+    head = upload.read(limit)
+    upload.seek(0)
+    try:
+        # Image.open only parses the header; pixels are decoded lazily and never here
+        with Image.open(BytesIO(head), formats=ALLOWED_FORMATS) as img:
+            return img.format, img.width, img.height
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(str(e) or "unrecognised image data") from e
+
+
+def validate_upload(upload):
+    """
+    Validate an uploaded photo's size, extension, format and dimensions
+    without decoding it.
+    Returns: (is_valid, error_message, image_info)
+    """
+    if upload.size > MAX_UPLOAD_BYTES:
+        return False, f"File size {upload.size / (1024*1024):.1f}MB exceeds 5MB limit.", None
+
+    if not upload.name.lower().endswith(ALLOWED_EXTENSIONS):
+        return False, "Only JPG, PNG, and GIF formats are allowed.", None
+
+    try:
+        image_format, width, height = read_image_header(upload)
+    except ValueError as e:
+        return False, f"Invalid image file: {e}", None
+
+    min_width, min_height = MIN_DIMENSIONS
+    if width < min_width or height < min_height:
+        return False, f"Image too small. Minimum 640x480px, got {width}x{height}px.", None
+
+    max_width, max_height = MAX_DIMENSIONS
+    if width > max_width or height > max_height:
+        return False, f"Image too large. Maximum 4000x3000px, got {width}x{height}px.", None
+
+    return True, None, {'width': width, 'height': height, 'format': image_format}
+
+
+# =========================
+# RENDERING (worker processes)
+# =========================
+def _to_rgb(img):
+    """Flatten transparency onto white, as the original upload path did."""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def render_renditions(data):
+    """
+    Decode ``data`` once and return {size: {"width", "height", "webp": bytes,
+    "jpeg": bytes}}. Pure function, so it can run in a worker process.
+    """
+    with Image.open(BytesIO(data)) as img:
+        # JPEG: let the decoder downscale by a power of two up front
+        img.draft('RGB', RENDITION_SIZES[0][1])
+        source = _to_rgb(ImageOps.exif_transpose(img))
+
+    renditions = {}
+    for name, box in RENDITION_SIZES:
+        source = source.copy()
+        source.thumbnail(box, Image.LANCZOS, reducing_gap=2.0)
+        rendition = {'width': source.width, 'height': source.height}
+        for key, pil_format, options in RENDITION_FORMATS:
+            output = BytesIO()
+            source.save(output, format=pil_format, **options)
+            rendition[key] = output.getvalue()
+        renditions[name] = rendition
+    return renditions
+
+
+# =========================
+# ORCHESTRATION (web/command process)
+# =========================
+_process_pool = None
+_dispatch_pool = None
+
+
+def _workers():
+    return max(1, getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2))
+
+
+def _render(data, pool=None):
+    if pool is None:
+        return render_renditions(data)
+    return pool.submit(render_renditions, data).result()
+
+
+def _claim_condition(statuses, stale_before):
+    from django.db.models import Q
+
+    condition = Q(processing_status__in=[status for status in statuses if status != 'processing'])
+    if stale_before is not None:
+        # a claim older than ``stale_before`` belongs to a worker that died
+        condition |= Q(processing_status='processing') & (
+            Q(processing_started_at__lt=stale_before) | Q(processing_started_at__isnull=True)
+        )
+    return condition
+
+
+def process_image(image_id, statuses=('pending',), pool=None, stale_before=None):
+    """
+    Render and store every rendition for one PropertyImage. The row is
+    claimed first (``statuses`` -> processing, stamped with
+    ``processing_started_at``) so only one worker owns it; a 'processing'
+    row is only taken over once its claim is older than ``stale_before``.
+    Results are written only while the claim is still ours. Returns True
+    when the image ends up ready.
+    """
+    from django.utils import timezone
+    from .models import PropertyImage
+
+    claimed_at = timezone.now()
+    claimed = PropertyImage.objects.filter(
+        _claim_condition(statuses, stale_before), pk=image_id,
+    ).update(processing_status='processing', processing_started_at=claimed_at)
+    if not claimed:
+        return False
+    owned = PropertyImage.objects.filter(pk=image_id, processing_started_at=claimed_at)
+
+    image = PropertyImage.objects.only('id', 'image', 'renditions').get(pk=image_id)
+    storage = image.image.storage
+    try:
+        with storage.open(image.image.name, 'rb') as fh:
+            rendered = _render(fh.read(), pool)
+
+        renditions = {}
+        for name, rendition in rendered.items():
+            stored = {'width': rendition['width'], 'height': rendition['height']}
+            for key, _, _ in RENDITION_FORMATS:
+                stored[key] = _store_rendition(storage, image_id, name, key, rendition[key])
+            renditions[name] = stored
+    except Exception:
+        logger.exception("Processing property image %s failed", image_id)
+        owned.update(processing_status='failed', processing_started_at=None)
+        return False
+
+    if not owned.update(processing_status='ready', renditions=renditions, processing_started_at=None):
+        # a sweep took the image over; its worker records the result
+        logger.warning("Lost the processing claim on property image %s", image_id)
+        return False
+    _delete_stale_renditions(storage, image.renditions, renditions)
+    # cached cards still point at the original upload
+    bump_catalogue_version()
+    return True
+
+
+def rendition_path(image_id, name, fmt, content):
+    """Content-hashed storage name, so rendition URLs can be cached forever."""
+    digest = hashlib.sha1(content).hexdigest()[:12]
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    return f'{RENDITION_DIR}/{image_id}/{name}-{digest}.{ext}'
+
+
+def _store_rendition(storage, image_id, name, fmt, content):
+    path = rendition_path(image_id, name, fmt, content)
+    if storage.exists(path):
+        # same name, same bytes
+        return path
+    return storage.save(path, ContentFile(content))
+
+
+def _delete_stale_renditions(storage, old, new):
+    keep = {path for rendition in new.values() for key, path in rendition.items() if isinstance(path, str)}
+    for rendition in (old or {}).values():
+        for key, _, _ in RENDITION_FORMATS:
+            path = rendition.get(key)
+            if path and path not in keep:
+                storage.delete(path)
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        # spawn: never fork a process that holds DB connections and threads
+        _process_pool = ProcessPoolExecutor(
+            max_workers=_workers(), mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _process_pool
+
+
+def _get_dispatch_pool():
+    global _dispatch_pool
+    if _dispatch_pool is None:
+        _dispatch_pool = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='property-images')
+    return _dispatch_pool
+
+
+def _process_in_background(image_id):
+    try:
+        process_image(image_id, pool=_get_process_pool())
+    except Exception:
+        logger.exception("Background processing of property image %s failed", image_id)
+    finally:
+        close_old_connections()
+
+
+def dispatch_image_processing(image_ids):
+    if getattr(settings, 'IMAGE_PROCESSING_SYNC', False):
+        for image_id in image_ids:
+            process_image(image_id)
+        return
+    pool = _get_dispatch_pool()
+    for image_id in image_ids:
+        pool.submit(_process_in_background, image_id)
+
+
+def process_images(image_ids, statuses=('pending',), workers=None):
+    """
+    Process ``image_ids`` in parallel across ``workers`` processes (inline
+    with ``IMAGE_PROCESSING_SYNC``) and wait for them. Returns how many are ready.
+    """
+    image_ids = list(image_ids)
+    if getattr(settings, 'IMAGE_PROCESSING_SYNC', False) or not image_ids:
+        return sum(process_image(image_id, statuses=statuses) for image_id in image_ids)
+
+    workers = workers or _workers()
+
+    def run(image_id):
+        try:
+            return process_image(image_id, statuses=statuses, pool=process_pool)
+        finally:
+            close_old_connections()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as process_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='property-images') as threads:
+        return sum(threads.map(run, image_ids))
+
+
+def enqueue_image_processing(image_ids):
+    """Process ``image_ids`` once the current transaction commits."""
+    image_ids = list(image_ids)
+    if image_ids:
+        transaction.on_commit(lambda: dispatch_image_processing(image_ids))
+
+
+def store_uploads(prop, files):
+    """Save uploads untouched as PropertyImage rows and queue their processing."""
+    from .models import PropertyImage
+
+    images = [PropertyImage.objects.create(property=prop, image=upload) for upload in files]
+    enqueue_image_processing(image.pk for image in images)
+    return images
+
+
+def pending_image_ids(include_failed=False, stale_before=None):
+    """
+    Images the sweep should (re)process: pending ones, those whose
+    ``processing`` claim was taken before ``stale_before`` and, optionally,
+    failed ones.
+    """
+    from .models import PropertyImage
+
+    statuses = ('pending', 'failed') if include_failed else ('pending',)
+    return list(
+        PropertyImage.objects.filter(_claim_condition(statuses, stale_before))
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+# =========================
+# COVER IMAGES
+# =========================
+def refresh_cover_images(property_ids):
+    """
+    Recompute ``Property.cover_image`` (first uploaded photo) and
+    ``Property.image_count`` for ``property_ids`` in two queries.
+    """
+    from django.db.models import Count, Min
+    from .models import Property, PropertyImage
+
+    property_ids = set(property_ids)
+    if not property_ids:
+        return
+    summary = {
+        row['property_id']: row
+        for row in PropertyImage.objects.filter(property_id__in=property_ids)
+        .values('property_id').annotate(cover_id=Min('pk'), count=Count('pk')).order_by()
+    }
+    Property.objects.bulk_update(
+        [
+            Property(
+                pk=pk,
+                cover_image_id=summary.get(pk, {}).get('cover_id'),
+                image_count=summary.get(pk, {}).get('count', 0),
+            )
+            for pk in property_ids
+        ],
+        ['cover_image', 'image_count'],
+    )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from listings.phonetics import backfill_phonetic_keys
+
+
+class Command(BaseCommand):
+    help = "Compute city_soundex/city_phonetic for properties whose stored keys are missing or stale."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        updated = backfill_phonetic_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated phonetic keys for {updated} properties."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from listings.fake_data import DEFAULT_PREFIX, FAKE_PASSWORD, clear, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic dataset (landlords, tenants, properties "
+        "around Nepali cities, bookings, chat messages, notifications) for "
+        "benchmarking. The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlords', type=int, default=20)
+        parser.add_argument('--tenants', type=int, default=100)
+        parser.add_argument('--properties', type=int, default=500)
+        parser.add_argument('--bookings', type=int, default=1000)
+        parser.add_argument('--messages-per-booking', type=int, default=4, help="Average per booking.")
+        parser.add_argument('--notifications-per-user', type=int, default=5, help="Average per user.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default=DEFAULT_PREFIX, help="Username prefix of generated users.")
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete data previously generated with --prefix first.")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear(options['prefix'])
+            self.stdout.write(f"Deleted {deleted} previously generated rows.")
+
+        counts = generate(
+            landlords=options['landlords'],
+            tenants=options['tenants'],
+            properties=options['properties'],
+            bookings=options['bookings'],
+            messages_per_booking=options['messages_per_booking'],
+            notifications_per_user=options['notifications_per_user'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+        )
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {summary}. Users log in with password '{FAKE_PASSWORD}'."
+        ))
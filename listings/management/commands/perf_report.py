@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from listings.perf import HISTOGRAM_BUCKETS_MS, view_report, view_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Print per-view request timings collected by PerformanceMiddleware: "
+        "request count, average and p50/p95 wall time, queries and DB time per "
+        "request, and cache hits/misses. Figures from other processes are only "
+        "visible when the cache is shared (REDIS_CACHE_URL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Show the N views with the most total time.")
+        parser.add_argument('--json', action='store_true', help="Print the full report, histograms included, as JSON.")
+        parser.add_argument('--reset', action='store_true', help="Clear the collected figures afterwards.")
+
+    def handle(self, *args, **options):
+        report = view_report()[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        elif report:
+            header = (f"{'view':<40} {'reqs':>7} {'avg ms':>8} {'p50':>6} {'p95':>6} "
+                      f"{'queries':>8} {'db ms':>7} {'cache hit/miss':>15}")
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            for row in report:
+                self.stdout.write(
+                    f"{row['view'][:40]:<40} {row['requests']:>7} {row['avg_ms']:>8} "
+                    f"{_bound(row['p50_ms']):>6} {_bound(row['p95_ms']):>6} {row['avg_queries']:>8} "
+                    f"{row['avg_db_ms']:>7} {row['cache_hits']:>7}/{row['cache_misses']:<7}"
+                )
+
+        if options['reset']:
+            view_stats.reset()
+        self.stdout.write(self.style.SUCCESS(f"Reported {len(report)} views."))
+
+
+def _bound(ms):
+    return f"<={ms}" if ms is not None else f">{HISTOGRAM_BUCKETS_MS[-1]}"
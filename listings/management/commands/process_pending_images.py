@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from listings.images import pending_image_ids, process_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate renditions for property images that are still pending, e.g. "
+        "uploads queued before a restart or images uploaded before renditions "
+        "existed. Run periodically as a safety net for the background pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes', type=int, default=15,
+            help="Also reclaim images whose 'processing' claim was taken this long ago.",
+        )
+        parser.add_argument('--retry-failed', action='store_true', help="Retry images that failed before.")
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        statuses = ['pending']
+        if options['retry_failed']:
+            statuses.append('failed')
+
+        ids = pending_image_ids(include_failed=options['retry_failed'], stale_before=stale_before)
+        ready = sum(process_image(image_id, statuses=statuses, stale_before=stale_before) for image_id in ids)
+        self.stdout.write(self.style.SUCCESS(f"Processed {ready} of {len(ids)} pending property images."))
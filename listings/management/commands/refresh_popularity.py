@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from listings.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute popularity scores for all properties. Booking changes update "
+        "scores incrementally; run this periodically (e.g. nightly) so the "
+        "30-day recency and booking windows decay."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        changed = refresh_popularity(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated popularity score for {changed} properties."))
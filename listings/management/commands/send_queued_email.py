@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from listings.outbox import drain, purge_sent, queue_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbound email in batches over one backend connection, "
+        "retrying failures with backoff. Run it from cron, or with --loop as a "
+        "long-running worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Defaults to EMAIL_QUEUE_BATCH_SIZE.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds between polls with --loop.")
+        parser.add_argument('--purge-days', type=int, default=30,
+                            help="Delete sent messages older than this many days first (0 keeps them).")
+
+    def handle(self, *args, **options):
+        if options['purge_days']:
+            purged = purge_sent(timedelta(days=options['purge_days']))
+            if purged:
+                self.stdout.write(f"Purged {purged} sent messages.")
+
+        while True:
+            totals = drain(batch_size=options['batch_size'])
+            if any(totals.values()) or not options['loop']:
+                stats = queue_stats()
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {totals['sent']}, retrying {totals['retrying']}, dead {totals['dead']}; "
+                    f"{stats['depth']} still queued."
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from listings.images import process_images
+from listings.models import PropertyImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the responsive renditions (thumb/card/full, WebP and JPEG) of every "
+        "property image that does not have them yet, in parallel, so no visitor "
+        "has to wait for one to be rendered on demand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Worker processes (default: IMAGE_PROCESSING_WORKERS).")
+        parser.add_argument('--force', action='store_true', help="Re-render images that are already ready.")
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed']
+        if options['force']:
+            statuses.append('ready')
+
+        ids = list(
+            PropertyImage.objects.filter(processing_status__in=statuses).order_by('pk').values_list('pk', flat=True)
+        )
+        ready = process_images(ids, statuses=statuses, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Rendered {ready} of {len(ids)} property images."))
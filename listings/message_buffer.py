@@ -0,0 +1,230 @@
+"""
+Write-behind buffers for booking chat, shared by every
+``BookingMessageConsumer`` in the process.
+
+Messages: a consumer broadcasts a message as soon as it arrives and hands
+the unsaved ``BookingMessage`` to ``message_buffer``, which persists pending
+messages with a single ``bulk_create`` once ``MAX_BATCH`` messages are
+waiting or ``MAX_DELAY_MS`` after the first one arrived, whichever comes
+first. When the batch insert fails the rows are written one by one, so a
+single bad row cannot hold back the others: a row rejected by the database
+(IntegrityError/DataError, e.g. its booking or sender was deleted) is
+logged and dropped; on any other error the row and everything after it go
+back in front of the queue and are retried after ``RETRY_DELAY_MS``, up to
+``MAX_WRITE_ATTEMPTS`` times for the failing row.
+
+Delivery is at-least-once: once a row's write has committed, a
+``message_ack`` (or ``message_rejected`` for a dropped row) keyed by its
+``client_id`` is sent to the channel in ``message._reply_channel``, and the
+chat client resends every message it has no answer for. Rows carry the
+client generated ``client_id`` (unique, inserted with ``ignore_conflicts``),
+so a resent or retried row never produces duplicates, and the
+``created_at`` the room was shown is the one stored.
+
+Read receipts: ``mark_read`` requests are coalesced in ``read_receipts`` per
+(booking, reader) into a high-water-mark message id, and applied every
+``READ_RECEIPT_DELAY_MS`` as one ``UPDATE`` per pair, after which a
+``read_receipt`` event is broadcast to the booking's room.
+"""
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import DataError, IntegrityError, transaction
+
+MAX_BATCH = 50
+MAX_DELAY_MS = 200
+RETRY_DELAY_MS = 1000
+MAX_WRITE_ATTEMPTS = 5
+READ_RECEIPT_DELAY_MS = 500
+
+logger = logging.getLogger(__name__)
+
+
+class _DebouncedBuffer:
+    """Runs ``flush()`` once, ``delay`` seconds after it is first scheduled."""
+
+    def __init__(self):
+        self._timer = None
+
+    async def flush(self):
+        raise NotImplementedError
+
+    def _timer_alive(self):
+        # a timer whose event loop has closed will never fire
+        timer = self._timer
+        return timer is not None and not timer.done() and not timer.get_loop().is_closed()
+
+    def _schedule(self, delay):
+        if not self._timer_alive():
+            self._timer = asyncio.ensure_future(self._flush_later(delay))
+
+    async def _flush_later(self, delay):
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self.flush()
+
+    def _cancel_timer(self):
+        alive = self._timer_alive()
+        timer, self._timer = self._timer, None
+        if alive and timer is not asyncio.current_task():
+            timer.cancel()
+
+
+class MessageWriteBuffer(_DebouncedBuffer):
+    def __init__(self, max_batch=MAX_BATCH, max_delay_ms=MAX_DELAY_MS, retry_delay_ms=RETRY_DELAY_MS):
+        super().__init__()
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.retry_delay = retry_delay_ms / 1000
+        self._pending = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def add(self, message):
+        self._pending.append(message)
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        else:
+            self._schedule(self.max_delay)
+
+    async def flush(self):
+        """Write every pending message now. Returns the number written."""
+        self._cancel_timer()
+        batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            await database_sync_to_async(self._write)(batch)
+            written, rejected = batch, []
+        except Exception:
+            logger.warning("Chat message batch of %d failed; writing rows one by one", len(batch), exc_info=True)
+            written, rejected, retry = await database_sync_to_async(self._write_each)(batch)
+            if retry:
+                self._pending[:0] = retry
+                self._schedule(self.retry_delay)
+
+        await self._reply(written, 'message_ack')
+        await self._reply(rejected, 'message_rejected')
+        return len(written)
+
+    async def _reply(self, messages, event_type):
+        """Tell each sender's consumer what became of its message."""
+        channel_layer = get_channel_layer()
+        for message in messages:
+            channel = getattr(message, '_reply_channel', None)
+            if not channel:
+                continue
+            try:
+                await channel_layer.send(channel, {'type': event_type, 'client_id': str(message.client_id)})
+            except Exception:
+                # no ack: the client resends and gets one next time
+                logger.warning("Could not send %s for chat message %s", event_type, message.client_id,
+                               exc_info=True)
+
+    def _write(self, batch):
+        from .models import BookingMessage
+
+        # own savepoint when nested, so a failed batch leaves the transaction usable
+        with transaction.atomic():
+            BookingMessage.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def _write_each(self, batch):
+        """Write rows separately; returns (rows written, rows rejected, rows to retry)."""
+        written, rejected = [], []
+        for index, message in enumerate(batch):
+            try:
+                self._write([message])
+            except (IntegrityError, DataError):
+                logger.error("Dropping chat message %s on booking %s: rejected by the database",
+                             message.client_id, message.booking_id, exc_info=True)
+                rejected.append(message)
+            except Exception:
+                message._write_attempts = getattr(message, '_write_attempts', 0) + 1
+                if message._write_attempts < MAX_WRITE_ATTEMPTS:
+                    return written, rejected, batch[index:]
+                # unacknowledged, so the sender's client resends it
+                logger.error("Dropping chat message %s on booking %s after %d attempts",
+                             message.client_id, message.booking_id, message._write_attempts, exc_info=True)
+            else:
+                written.append(message)
+        return written, rejected, []
+
+
+message_buffer = MessageWriteBuffer()
+
+
+class ReadReceiptBuffer(_DebouncedBuffer):
+    def __init__(self, delay_ms=READ_RECEIPT_DELAY_MS, messages=message_buffer):
+        super().__init__()
+        self.delay = delay_ms / 1000
+        self.messages = messages
+        # (booking_id, reader_id) -> [highest message id, newest client id]
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def mark(self, booking_id, reader_id, up_to_id=None, client_id=None):
+        """
+        Record that ``reader_id`` has read the booking's messages up to
+        message ``up_to_id`` and/or the message sent as ``client_id`` (live
+        messages are only known by their client id until they are flushed).
+        """
+        mark = self._pending.setdefault((booking_id, reader_id), [0, None])
+        if up_to_id:
+            mark[0] = max(mark[0], up_to_id)
+        if client_id:
+            mark[1] = client_id
+        self._schedule(self.delay)
+
+    async def flush(self):
+        """Apply pending receipts and broadcast them. Returns the number applied."""
+        self._cancel_timer()
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        # messages referenced by client id must be stored before they can be marked
+        await self.messages.flush()
+        try:
+            receipts = await database_sync_to_async(self._write)(pending)
+        except Exception:
+            logger.warning("Read receipt flush failed; retrying %d receipts", len(pending), exc_info=True)
+            for key, (up_to_id, client_id) in pending.items():
+                mark = self._pending.setdefault(key, [0, None])
+                mark[0] = max(mark[0], up_to_id)
+                mark[1] = mark[1] or client_id
+            self._schedule(self.delay)
+            return 0
+
+        channel_layer = get_channel_layer()
+        for (booking_id, reader_id), up_to_id in receipts:
+            await channel_layer.group_send(f'booking_{booking_id}', {
+                'type': 'read_receipt',
+                'reader_id': reader_id,
+                'up_to_id': up_to_id,
+            })
+        return len(receipts)
+
+    def _write(self, pending):
+        from .models import BookingMessage
+
+        receipts = []
+        for (booking_id, reader_id), (up_to_id, client_id) in pending.items():
+            if client_id:
+                stored = BookingMessage.objects.filter(
+                    booking_id=booking_id, client_id=client_id
+                ).values_list('pk', flat=True).first()
+                up_to_id = max(up_to_id, stored or 0)
+            if not up_to_id:
+                continue
+            BookingMessage.objects.filter(
+                booking_id=booking_id, pk__lte=up_to_id, is_read=False,
+            ).exclude(sender_id=reader_id).update(is_read=True)
+            receipts.append(((booking_id, reader_id), up_to_id))
+        return receipts
+
+
+read_receipts = ReadReceiptBuffer()
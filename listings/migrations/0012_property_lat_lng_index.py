@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_settlement_owner_receipt_confirmed_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['latitude', 'longitude'], name='listings_pr_latitud_6ef2f2_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of the scoring rules in listings.popularity as of this
+# migration; later changes to that module must not alter this backfill.
+POPULARITY_WINDOW_DAYS = 30
+POPULAR_BOOKING_STATUSES = ('approved', 'pending')
+
+
+def backfill_popularity(apps, schema_editor):
+    from datetime import timedelta
+    from django.db.models import Count, Q
+    from django.utils import timezone
+
+    Property = apps.get_model('listings', 'Property')
+    now = timezone.now()
+    today = now.date()
+    rows = Property.objects.annotate(
+        recent_bookings=Count('booking', filter=Q(
+            booking__created_at__gte=now - timedelta(days=POPULARITY_WINDOW_DAYS),
+            booking__status__in=POPULAR_BOOKING_STATUSES,
+        ))
+    )
+    for prop in rows:
+        days_old = (today - prop.created_at.date()).days
+        prop.popularity_score = (
+            min(prop.recent_bookings * 10, 40)
+            + (max(0, 30 - days_old) if days_old <= 30 else 0)
+            + (30 if prop.is_verified else 0)
+        )
+    Property.objects.bulk_update(rows, ['popularity_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_property_lat_lng_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='popularity_score',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_verified', '-popularity_score', '-created_at'], name='listings_pr_is_veri_3ab988_idx'),
+        ),
+    ]
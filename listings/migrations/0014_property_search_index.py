@@ -0,0 +1,42 @@
+import sqlite3
+
+from django.db import migrations
+
+# Frozen copy of the listings.search schema as of this migration.
+SEARCH_TABLE = 'listings_property_search'
+SEARCH_FIELDS = ('city', 'title', 'description', 'address')
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    # the trigram tokenizer needs SQLite 3.34+; without it search uses the ORM
+    if connection.vendor != 'sqlite' or sqlite3.sqlite_version_info < (3, 34, 0):
+        return
+    Property = apps.get_model('listings', 'Property')
+    rows = Property.objects.filter(is_verified=True).values_list('id', *SEARCH_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='trigram')"
+        )
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+            list(rows),
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0013_property_popularity_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:20
+
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copy of the key functions in listings.phonetics as of this
+# migration; later changes to that module must not alter this backfill.
+PHONETIC_KEY_LENGTH = 32
+SOUNDEX_DIGITS = {
+    char: digit
+    for letters, digit in (
+        ('BFPV', '1'), ('CGJKQSXZ', '2'), ('DT', '3'),
+        ('L', '4'), ('MN', '5'), ('R', '6'),
+    )
+    for char in letters
+}
+SOUNDEX_SEPARATORS = frozenset('AEIOUHWY')
+DIGRAPHS = (
+    ('chh', 'c'), ('ch', 'c'), ('kh', 'k'), ('gh', 'g'), ('jh', 'j'),
+    ('th', 't'), ('dh', 'd'), ('ph', 'f'), ('bh', 'b'), ('sh', 's'),
+    ('ck', 'k'), ('ks', 'x'),
+)
+DIGRAPH_RE = re.compile('|'.join(src for src, _ in DIGRAPHS))
+DIGRAPH_MAP = dict(DIGRAPHS)
+SINGLE = str.maketrans({'w': 'v', 'z': 'j', 'q': 'k'})
+VOWELS = frozenset('aeiouyh')
+
+
+def soundex(word):
+    word = (word or '').upper().strip()
+    if not word:
+        return '0000'
+    code = word[0]
+    prev_digit = None
+    for char in word[1:]:
+        if len(code) >= 4:
+            break
+        if char in SOUNDEX_SEPARATORS:
+            prev_digit = None
+            continue
+        digit = SOUNDEX_DIGITS.get(char)
+        if digit and digit != prev_digit:
+            code += digit
+            prev_digit = digit
+    return (code + '000')[:4]
+
+
+def phonetic_key(word):
+    word = re.sub(r'[^a-z]', '', (word or '').lower())
+    if not word:
+        return ''
+    word = DIGRAPH_RE.sub(lambda m: DIGRAPH_MAP[m.group(0)], word).translate(SINGLE)
+    key = [word[0]]
+    for char in word[1:]:
+        if char in VOWELS or char == key[-1]:
+            continue
+        key.append(char)
+    return ''.join(key)[:PHONETIC_KEY_LENGTH]
+
+
+def backfill_phonetic_keys(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    changed = []
+    for prop in Property.objects.order_by().only('id', 'city').iterator(chunk_size=500):
+        prop.city_soundex, prop.city_phonetic = soundex(prop.city), phonetic_key(prop.city)
+        changed.append(prop)
+    Property.objects.bulk_update(changed, ['city_soundex', 'city_phonetic'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0014_property_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='city_phonetic',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='city_soundex',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=4),
+        ),
+        migrations.RunPython(backfill_phonetic_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0015_property_phonetic_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'status', 'start_date', 'end_date'], name='listings_bo_propert_824137_idx'),
+        ),
+    ]
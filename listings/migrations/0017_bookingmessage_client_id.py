@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0016_booking_availability_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingmessage',
+            name='client_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
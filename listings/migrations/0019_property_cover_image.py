@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def backfill_cover_images(apps, schema_editor):
+    Property = apps.get_model('listings', 'Property')
+    PropertyImage = apps.get_model('listings', 'PropertyImage')
+    summary = (
+        PropertyImage.objects.values('property_id')
+        .annotate(cover_id=Min('pk'), count=Count('pk')).order_by()
+    )
+    Property.objects.bulk_update(
+        [Property(pk=row['property_id'], cover_image_id=row['cover_id'], image_count=row['count']) for row in summary],
+        ['cover_image', 'image_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0018_propertyimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listings.propertyimage'),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='image_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
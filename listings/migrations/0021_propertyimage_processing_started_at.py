@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0020_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
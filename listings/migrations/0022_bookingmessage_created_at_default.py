@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0021_propertyimage_processing_started_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookingmessage',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+    ]
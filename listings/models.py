@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from datetime import date, timedelta
 from users.models import CustomUser
 
@@ -26,19 +27,73 @@ class Property(models.Model):
     )
     is_verified = models.BooleanField(default=False, db_index=True)  # Added index
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by listings.popularity (signals + refresh_popularity command)
+    popularity_score = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Phonetic keys for fuzzy city search (see listings.phonetics)
+    city_soundex = models.CharField(max_length=4, blank=True, db_index=True, editable=False)
+    city_phonetic = models.CharField(max_length=32, blank=True, db_index=True, editable=False)
+    # First photo and photo count for listing cards, maintained from PropertyImage
+    # (see listings.images.refresh_cover_images)
+    cover_image = models.ForeignKey(
+        'PropertyImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+    )
+    image_count = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def compute_phonetic_keys(self):
+        from .phonetics import phonetic_key, soundex
+        self.city_soundex = soundex(self.city)
+        self.city_phonetic = phonetic_key(self.city)
+
+    def save(self, *args, **kwargs):
+        self.compute_phonetic_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'city' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'city_soundex', 'city_phonetic'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # bounding-box prefilter for radius search
+            models.Index(fields=['latitude', 'longitude']),
+            # featured listings: top N verified by popularity
+            models.Index(fields=['is_verified', '-popularity_score', '-created_at']),
+        ]
 
 
 class PropertyImage(models.Model):
     """Multiple images per property (max 4)"""
+    PROCESSING_STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
+    # the upload as received; resized copies are listed in ``renditions``
     image = models.ImageField(upload_to='property_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        editable=False,
+    )
+    # when the current 'processing' claim was taken; stale claims are reclaimed
+    processing_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # {"card": {"width": ..., "height": ..., "webp": <name>, "jpeg": <name>}, ...}
+    # filled in by listings.images
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ['uploaded_at']
@@ -46,6 +101,13 @@ class PropertyImage(models.Model):
     def __str__(self):
         return f"Image for {self.property.title}"
 
+    def rendition_url(self, size='card', fmt='jpeg'):
+        """URL of a processed rendition, or of the original upload until it is ready."""
+        rendition = (self.renditions or {}).get(size)
+        if rendition and rendition.get(fmt):
+            return self.image.storage.url(rendition[fmt])
+        return self.image.url
+
     def clean(self):
         """Ensure property doesn't exceed 4 images"""
         if self.property.images.exclude(id=self.id).count() >= 4:
@@ -81,25 +143,51 @@ class Booking(models.Model):
     finalized_at = models.DateTimeField(blank=True, null=True, help_text="When landlord finalized the booking (rented_out)")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # overlap checks and availability anti-joins
+            models.Index(fields=['property', 'status', 'start_date', 'end_date']),
+        ]
+
     def __str__(self):
         return f"{self.property.title} - {self.tenant.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember loaded values so signals can detect status changes without a query
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def status_changed(self):
+        loaded = getattr(self, '_loaded_values', None)
+        return loaded is None or loaded.get('status', self.status) != self.status
+
     # --------------------------
     # Booking Conflict Detection
     # --------------------------
     def clean(self):
         """
         This method runs before saving a Booking.
-        Validates dates and checks for conflicts with existing approved bookings.
+        Validates dates and checks for conflicts with existing bookings.
         """
+        self.validate_dates()
+        self.check_conflicts()
+
+    def validate_dates(self):
         today = date.today()
         
         # Validate start date is not in the past (allow today and future).
         # Skip this check when an existing booking is being finalized without changing dates.
         date_has_changed = True
         if self.pk:
-            original = Booking.objects.filter(pk=self.pk).only('start_date', 'end_date').first()
-            if original and original.start_date == self.start_date and original.end_date == self.end_date:
+            loaded = getattr(self, '_loaded_values', None)
+            if loaded is not None and 'start_date' in loaded and 'end_date' in loaded:
+                original_dates = (loaded['start_date'], loaded['end_date'])
+            else:
+                original = Booking.objects.filter(pk=self.pk).only('start_date', 'end_date').first()
+                original_dates = (original.start_date, original.end_date) if original else None
+            if original_dates == (self.start_date, self.end_date):
                 date_has_changed = False
 
         if date_has_changed and self.start_date < today:
@@ -112,28 +200,33 @@ class Booking(models.Model):
         # Validate minimum booking duration (1 day)
         if (self.end_date - self.start_date).days < 1:
             raise ValidationError("Minimum booking duration is 1 day.")
-        
-        # Check for date overlaps with existing bookings.
-        # We block overlaps for both approved and pending so multiple tenants
-        # cannot reserve the same dates concurrently.
-        conflicts = Booking.objects.filter(
-            property=self.property,
-            status__in=['approved', 'pending'],
-            start_date__lt=self.end_date,
-            end_date__gt=self.start_date
-        )
-        
-        # Exclude self in case of updating existing booking
-        if self.pk:
-            conflicts = conflicts.exclude(pk=self.pk)
 
+    def check_conflicts(self):
+        # Check for date overlaps with existing bookings that hold the dates
+        # (see listings.availability.BLOCKING_STATUSES) so multiple tenants
+        # cannot reserve the same dates concurrently.
+        from .availability import BLOCKING_STATUSES, overlapping_bookings
+        if self.status not in BLOCKING_STATUSES:
+            # a booking that no longer holds its dates cannot conflict, so
+            # rejecting or cancelling one of two legacy overlaps still works
+            return
+        conflicts = overlapping_bookings(self.property_id, self.start_date, self.end_date, exclude_id=self.pk)
         if conflicts.exists():
             raise ValidationError("Booking dates conflict with an existing approved booking.")
 
-    def save(self, *args, **kwargs):
-        # Run clean() before saving to ensure conflict detection
-        self.clean()
+    def save(self, *args, check_conflicts=True, **kwargs):
+        # Run validation before saving to ensure conflict detection.
+        # listings.availability.check_and_reserve passes check_conflicts=False
+        # because it has already run the overlap test under a row lock.
+        self.validate_dates()
+        if check_conflicts:
+            self.check_conflicts()
         super().save(*args, **kwargs)
+        self._loaded_values = {
+            'status': self.status,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+        }
 
 
 class PropertyDeleteReason(models.Model):
@@ -406,8 +499,11 @@ class BookingMessage(models.Model):
         db_index=True
     )
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # not auto_now_add: buffered chat rows keep the time they were broadcast with
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
     is_read = models.BooleanField(default=False, db_index=True)
+    # Generated by the chat client; makes write-behind retries idempotent
+    client_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ['created_at']
@@ -418,3 +514,37 @@ class BookingMessage(models.Model):
 
     def __str__(self):
         return f"Message from {self.sender.username} on booking {self.booking.id}"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email waiting to be sent. Views enqueue rows
+    (listings.outbox) and the send_queued_email command delivers them.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),  # gave up after EMAIL_QUEUE_MAX_ATTEMPTS
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,220 @@
+"""
+Outbound email queue.
+
+Views never talk to the SMTP relay. ``enqueue_email`` stores the message as
+an ``OutboundEmail`` row (one INSERT, committed with the request's other
+writes) and the ``send_queued_email`` command delivers the queue:
+
+- rows are claimed in batches of ``EMAIL_QUEUE_BATCH_SIZE`` (``pending`` ->
+  ``sending``, skipping rows another worker has locked) and sent over one
+  backend connection, so a batch costs one SMTP handshake;
+- a failed message goes back to ``pending`` with an exponential backoff of
+  ``EMAIL_QUEUE_RETRY_SECONDS * 2 ** (attempts - 1)`` (capped at
+  ``MAX_RETRY_DELAY``); after ``EMAIL_QUEUE_MAX_ATTEMPTS`` it is left as
+  ``dead`` with its last error, for an admin to inspect and requeue;
+- rows stuck in ``sending`` (a worker died mid-batch) are reclaimed after
+  ``STALE_CLAIM``, so delivery is at-least-once.
+
+Whatever ``EMAIL_BACKEND`` is configured does the sending; the console,
+file and locmem backends make the whole pipeline work offline.
+``queue_stats()`` reports the queue depth, the age of the oldest waiting
+message, enqueue-to-sent latency and average backend send time; it backs
+the admin ``email-queue`` endpoint.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+MAX_RETRY_DELAY = timedelta(hours=6)
+STALE_CLAIM = timedelta(minutes=15)
+LATENCY_WINDOW = timedelta(hours=1)
+SEND_TIME_KEY = 'email-queue:send-ms'
+SEND_COUNT_KEY = 'email-queue:sent'
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# =========================
+# ENQUEUE (request)
+# =========================
+def enqueue_email(subject, message, recipient_list, from_email=None):
+    """Queue a plain-text email; same arguments as ``send_mail``."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+# =========================
+# DELIVERY (worker)
+# =========================
+def retry_delay(attempts):
+    """Backoff before the next try after ``attempts`` failures, with 10% jitter."""
+    base = _setting('EMAIL_QUEUE_RETRY_SECONDS', 60) * 2 ** (attempts - 1)
+    delay = min(timedelta(seconds=base), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.9, 1.1)
+
+
+def claim_batch(limit=None):
+    """Mark up to ``limit`` due messages as ``sending`` and return them."""
+    limit = limit or _setting('EMAIL_QUEUE_BATCH_SIZE', 50)
+    now = timezone.now()
+    due = (
+        Q(status='pending', next_attempt_at__lte=now)
+        | Q(status='sending', claimed_at__lt=now - STALE_CLAIM)
+    )
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due).order_by('next_attempt_at').values_list('pk', flat=True)[:limit]
+        )
+        OutboundEmail.objects.filter(pk__in=ids).update(status='sending', claimed_at=now)
+    return list(OutboundEmail.objects.filter(pk__in=ids).order_by('next_attempt_at'))
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'[:2000]
+    email.claimed_at = None
+    if email.attempts >= _setting('EMAIL_QUEUE_MAX_ATTEMPTS', 6):
+        email.status = 'dead'
+        logger.error("Giving up on email %s to %s after %d attempts: %s",
+                     email.pk, email.to, email.attempts, email.last_error)
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def send_batch(emails, connection=None):
+    """
+    Send claimed ``emails`` over one backend connection and record the
+    outcome of each. Returns {"sent", "retrying", "dead"} counts.
+    """
+    connection = connection or get_connection(fail_silently=False)
+    sent, failed = [], []
+    send_ms = 0.0
+    try:
+        connection.open()
+    except Exception as exc:
+        # relay unreachable: the whole batch retries later
+        logger.warning("Could not connect to the email backend: %s", exc)
+        failed = [(email, exc) for email in emails]
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.to, connection=connection,
+                )
+                started = time.perf_counter()
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:
+                    failed.append((email, exc))
+                    # the session may be unusable; the next send reconnects
+                    connection.close()
+                else:
+                    sent.append(email.pk)
+                    send_ms += (time.perf_counter() - started) * 1000
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(pk__in=sent).update(
+            status='sent', sent_at=now, claimed_at=None, attempts=F('attempts') + 1, last_error='',
+        )
+        _add(SEND_COUNT_KEY, len(sent))
+        _add(SEND_TIME_KEY, round(send_ms))
+    for email, exc in failed:
+        _record_failure(email, exc, now)
+    OutboundEmail.objects.bulk_update(
+        [email for email, _ in failed],
+        ['status', 'attempts', 'next_attempt_at', 'claimed_at', 'last_error'],
+    )
+
+    dead = sum(email.status == 'dead' for email, _ in failed)
+    return {'sent': len(sent), 'retrying': len(failed) - dead, 'dead': dead}
+
+
+def drain(batch_size=None, max_batches=None):
+    """Send batches until nothing is due (or ``max_batches``); returns summed counts."""
+    totals = {'sent': 0, 'retrying': 0, 'dead': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        emails = claim_batch(batch_size)
+        if not emails:
+            break
+        for outcome, count in send_batch(emails).items():
+            totals[outcome] += count
+        batches += 1
+    return totals
+
+
+def requeue(queryset):
+    """Give dead (or any) messages a fresh set of attempts, due now."""
+    return queryset.update(
+        status='pending', attempts=0, next_attempt_at=timezone.now(), claimed_at=None,
+    )
+
+
+def purge_sent(older_than):
+    deleted, _ = OutboundEmail.objects.filter(status='sent', sent_at__lt=timezone.now() - older_than).delete()
+    return deleted
+
+
+# =========================
+# METRICS
+# =========================
+def _add(key, amount):
+    try:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+    except Exception:
+        logger.warning("Could not record email queue metrics", exc_info=True)
+
+
+def queue_stats():
+    """Queue depth, oldest waiting message and delivery latency for monitoring."""
+    now = timezone.now()
+    by_status = dict(OutboundEmail.objects.values_list('status').annotate(Count('pk')).order_by())
+    oldest = OutboundEmail.objects.filter(status__in=('pending', 'sending')).aggregate(
+        oldest=Min('created_at'),
+    )['oldest']
+
+    latencies = sorted(
+        (sent_at - created_at).total_seconds()
+        for created_at, sent_at in OutboundEmail.objects.filter(
+            status='sent', sent_at__gte=now - LATENCY_WINDOW,
+        ).values_list('created_at', 'sent_at')
+    )
+    sent_total = cache.get(SEND_COUNT_KEY, 0)
+
+    return {
+        'depth': by_status.get('pending', 0) + by_status.get('sending', 0),
+        'by_status': {status: by_status.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES},
+        'oldest_waiting_seconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+        'delivery_latency_seconds': {
+            'window_seconds': int(LATENCY_WINDOW.total_seconds()),
+            'count': len(latencies),
+            'p50': round(latencies[len(latencies) // 2], 2) if latencies else None,
+            'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2) if latencies else None,
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+        'avg_send_ms': round(cache.get(SEND_TIME_KEY, 0) / sent_total, 1) if sent_total else None,
+    }
@@ -0,0 +1,181 @@
+"""
+Versioned caching of the public catalogue pages.
+
+Anonymous ``home``, ``property_list`` and ``property_detail`` responses are
+cached whole (``anonymous_page_cache``), and listing cards are cached as
+template fragments for every visitor (``{% cache_fragment %}`` in
+``listings.templatetags.listing_cache``).
+
+Every key embeds the current *catalogue version*, a single counter that the
+signals in ``listings.signals`` bump whenever a Property, PropertyImage or
+Booking changes. Bumping it orphans every cached page and fragment at once
+(they age out of the cache), so invalidation costs one ``incr`` instead of
+a scan for affected keys.
+
+Page keys are built from the normalised query parameters only (``q``,
+``city``, ``max_rent``, ``sort``, ``lat``/``lng`` rounded to ~100m, ...),
+so equivalent URLs share an entry. Hits and misses are counted per layer
+in the cache itself; ``cache_stats()`` reports them for monitoring.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+CATALOGUE_VERSION_KEY = 'catalogue-version'
+PAGE_CACHE_TIMEOUT = 300
+FRAGMENT_CACHE_TIMEOUT = 3600
+COORDINATE_PRECISION = 3  # decimal places, ~110m of latitude
+CACHE_LAYERS = ('page', 'fragment')
+
+
+# =========================
+# CATALOGUE VERSION
+# =========================
+def catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # start from the clock so an evicted counter never reuses an old version
+        cache.add(CATALOGUE_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue page and fragment."""
+    try:
+        return cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        return catalogue_version()
+
+
+# =========================
+# HIT/MISS COUNTERS
+# =========================
+def _counter_key(layer, outcome):
+    return f'catalogue-cache-stats:{layer}:{outcome}'
+
+
+def record(layer, hit):
+    key = _counter_key(layer, 'hits' if hit else 'misses')
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """{layer: {"hits", "misses", "hit_rate"}} since the counters were last reset."""
+    keys = [_counter_key(layer, outcome) for layer in CACHE_LAYERS for outcome in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+    stats = {}
+    for layer in CACHE_LAYERS:
+        hits = counts.get(_counter_key(layer, 'hits'), 0)
+        misses = counts.get(_counter_key(layer, 'misses'), 0)
+        stats[layer] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([_counter_key(layer, outcome) for layer in CACHE_LAYERS for outcome in ('hits', 'misses')])
+
+
+# =========================
+# KEYS
+# =========================
+def _normalise(name, value):
+    value = value.strip()
+    if name in ('lat', 'lng'):
+        try:
+            return f'{float(value):.{COORDINATE_PRECISION}f}'
+        except ValueError:
+            return ''
+    if name in ('max_rent', 'radius_km'):
+        try:
+            return f'{float(value):g}'
+        except ValueError:
+            return ''
+    if name == 'page':
+        return value if value.isdigit() and value != '1' else ''
+    return value.lower()
+
+
+def page_cache_key(view_name, params, path_kwargs=None, version=None):
+    """Key for ``view_name`` given the request's ``params`` (a QueryDict or dict)."""
+    parts = [f'{name}={value}' for name, value in sorted((path_kwargs or {}).items())]
+    for name in sorted(params):
+        value = _normalise(name, params.get(name, ''))
+        if value:
+            parts.append(f'{name}={value}')
+    digest = hashlib.md5('&'.join(parts).encode()).hexdigest()
+    version = catalogue_version() if version is None else version
+    return f'catalogue-page:{view_name}:{version}:{digest}'
+
+
+def fragment_cache_key(name, vary_on, version=None):
+    digest = hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    version = catalogue_version() if version is None else version
+    return f'catalogue-fragment:{name}:{version}:{digest}'
+
+
+# =========================
+# PAGE CACHE
+# =========================
+def _page_cache_timeout():
+    return getattr(settings, 'ANONYMOUS_PAGE_CACHE_TIMEOUT', PAGE_CACHE_TIMEOUT)
+
+
+def _cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # flash messages are per visitor
+        and not len(get_messages(request))
+        and _page_cache_timeout() > 0
+    )
+
+
+def _cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # a CSRF token in the page belongs to this visitor
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def anonymous_page_cache(*param_names):
+    """
+    Cache a view's response for anonymous visitors, keyed on the path
+    arguments and the normalised ``param_names`` of the query string.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            params = {name: request.GET.get(name, '') for name in param_names}
+            key = page_cache_key(view.__name__, params, kwargs)
+            cached = cache.get(key)
+            record('page', hit=cached is not None)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if _cacheable_response(request, response):
+                cache.set(key, (response.content, response['Content-Type']), _page_cache_timeout())
+            return response
+        return wrapper
+    return decorator
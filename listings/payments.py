@@ -11,43 +11,46 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
+from .access import booking_role, is_booking_participant
 from .models import Settlement
+from users.notifications import notify
 
 
 @login_required
 def payment_gateway_selection(request, settlement_id):
     """Allow user to select payment gateway for settlement payment."""
-    settlement = get_object_or_404(Settlement, id=settlement_id)
+    settlement = get_object_or_404(
+        Settlement.objects.select_related('lease__tenant', 'lease__property__landlord'), id=settlement_id
+    )
 
     # Check permissions
-    if not (settlement.exit_request.booking.tenant == request.user or
-            settlement.exit_request.booking.property.landlord == request.user):
+    role = booking_role(request.user, settlement.lease_id)
+    if role is None:
         messages.error(request, "You don't have permission to access this settlement.")
         return redirect('dashboard')
 
     if settlement.status != 'completed':
         messages.error(request, "Settlement must be completed before payment.")
-        return redirect('early_exit_detail', settlement.exit_request.id)
+        return redirect('early_exit_detail', settlement.exit_request_id)
 
     # Determine who needs to pay whom
+    booking = settlement.lease
     if settlement.net_payable_to_owner > 0:
         # Tenant owes money to owner
-        payer = settlement.exit_request.booking.tenant
-        payee = settlement.exit_request.booking.property.landlord
+        payer_role, payer, payee = 'tenant', booking.tenant, booking.property.landlord
         amount = settlement.net_payable_to_owner
         description = f"Payment to landlord for settlement #{settlement.id}"
     elif settlement.net_refund_to_tenant > 0:
         # Owner owes refund to tenant
-        payer = settlement.exit_request.booking.property.landlord
-        payee = settlement.exit_request.booking.tenant
+        payer_role, payer, payee = 'landlord', booking.property.landlord, booking.tenant
         amount = settlement.net_refund_to_tenant
         description = f"Refund from landlord for settlement #{settlement.id}"
     else:
         messages.info(request, "No payment is required for this settlement.")
-        return redirect('early_exit_detail', settlement.exit_request.id)
+        return redirect('early_exit_detail', settlement.exit_request_id)
 
     # Check if current user is the payer
-    if request.user != payer:
+    if role != payer_role:
         messages.error(request, "You are not the party responsible for payment.")
         return redirect('dashboard')
 
@@ -69,8 +72,7 @@ def initiate_stripe_payment(request, settlement_id):
     settlement = get_object_or_404(Settlement, id=settlement_id)
 
     # Validate permissions and settlement status
-    if not (settlement.exit_request.booking.tenant == request.user or
-            settlement.exit_request.booking.property.landlord == request.user):
+    if not is_booking_participant(request.user, settlement.lease_id):
         return JsonResponse({'error': 'Permission denied'}, status=403)
 
     if settlement.status != 'completed':
@@ -142,7 +144,6 @@ def stripe_webhook(request):
                 settlement.save()
 
                 # Create notification for payee
-                from users.models import Notification
                 if settlement.net_payable_to_owner > 0:
                     # Tenant paid owner
                     recipient = settlement.exit_request.booking.property.landlord
@@ -154,7 +155,7 @@ def stripe_webhook(request):
                     title = "Refund Received"
                     message = f"You have received a refund of Rs. {settlement.payment_amount} for settlement #{settlement.id}"
 
-                Notification.objects.create(
+                notify(
                     recipient=recipient,
                     title=title,
                     message=message,
@@ -189,8 +190,7 @@ def initiate_esewa_payment(request, settlement_id):
     settlement = get_object_or_404(Settlement, id=settlement_id)
 
     # Validate permissions and settlement status
-    if not (settlement.exit_request.booking.tenant == request.user or
-            settlement.exit_request.booking.property.landlord == request.user):
+    if not is_booking_participant(request.user, settlement.lease_id):
         return JsonResponse({'error': 'Permission denied'}, status=403)
 
     if settlement.status != 'completed':
@@ -233,8 +233,7 @@ def initiate_khalti_payment(request, settlement_id):
     settlement = get_object_or_404(Settlement, id=settlement_id)
 
     # Validate permissions and settlement status
-    if not (settlement.exit_request.booking.tenant == request.user or
-            settlement.exit_request.booking.property.landlord == request.user):
+    if not is_booking_participant(request.user, settlement.lease_id):
         return JsonResponse({'error': 'Permission denied'}, status=403)
 
     if settlement.status != 'completed':
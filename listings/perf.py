@@ -0,0 +1,242 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` records, for every request: the view, wall time,
+number of DB queries and time spent in them (via
+``connection.execute_wrapper``) and cache hits/misses on the default cache.
+Requests slower than ``PERF_SLOW_REQUEST_MS`` or running more than
+``PERF_QUERY_COUNT_THRESHOLD`` queries are logged to ``listings.perf``
+together with their most repeated SQL statements, which is how N+1 loops
+show up.
+
+Per-view totals and a wall-time histogram are accumulated in process and
+flushed into the cache every ``PERF_FLUSH_SECONDS`` as ``incr`` counters, so
+every worker adds to the same figures. ``view_report()`` reads them back;
+it backs the admin ``perf`` endpoint and the ``perf_report`` command (which
+only sees other processes' figures with a shared cache, i.e. REDIS_CACHE_URL).
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (ms) of the wall-time histogram buckets; the last one is open
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+METRICS = ('requests', 'time_ms', 'queries', 'db_ms', 'cache_hits', 'cache_misses')
+VIEW_INDEX_KEY = 'perf:views'
+_MISSING = object()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# =========================
+# PER-REQUEST COLLECTION
+# =========================
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicate_statements(self, top=5):
+        return [(sql, count) for sql, count in self.statements.most_common(top) if count > 1]
+
+
+class _CountingCache:
+    """Counts hits/misses of ``get``/``get_many`` on one cache instance while active."""
+
+    def __init__(self, cache, profile):
+        self.cache = cache
+        self.profile = profile
+
+    def __enter__(self):
+        cache, profile = self.cache, self.profile
+        get, get_many = cache.get, cache.get_many
+
+        def counting_get(key, default=None, version=None):
+            value = get(key, _MISSING, version=version)
+            if value is _MISSING:
+                profile.cache_misses += 1
+                return default
+            profile.cache_hits += 1
+            return value
+
+        def counting_get_many(keys, version=None):
+            keys = list(keys)
+            found = get_many(keys, version=version)
+            profile.cache_hits += len(found)
+            profile.cache_misses += len(keys) - len(found)
+            return found
+
+        cache.get, cache.get_many = counting_get, counting_get_many
+        return self
+
+    def __exit__(self, *exc_info):
+        del self.cache.get, self.cache.get_many
+
+
+# =========================
+# AGGREGATION
+# =========================
+def _bucket(ms):
+    for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def _key(view, field):
+    return f'perf:view:{view}:{field}'
+
+
+class ViewStats:
+    """In-process per-view counters, periodically added to the shared cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._last_flush = time.monotonic()
+
+    def add(self, view, elapsed_ms, profile):
+        with self._lock:
+            counters = self._pending[view]
+            counters['requests'] += 1
+            counters['time_ms'] += round(elapsed_ms)
+            counters['queries'] += profile.queries
+            counters['db_ms'] += round(profile.db_time * 1000)
+            counters['cache_hits'] += profile.cache_hits
+            counters['cache_misses'] += profile.cache_misses
+            counters[f'bucket_{_bucket(elapsed_ms)}'] += 1
+            due = time.monotonic() - self._last_flush >= _setting('PERF_FLUSH_SECONDS', 10)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        cache = caches['default']
+        try:
+            for view, counters in pending.items():
+                for field, amount in counters.items():
+                    if not amount:
+                        continue
+                    key = _key(view, field)
+                    if not cache.add(key, amount, timeout=None):
+                        cache.incr(key, amount)
+            views = cache.get(VIEW_INDEX_KEY) or set()
+            if not views.issuperset(pending):
+                cache.set(VIEW_INDEX_KEY, views | set(pending), timeout=None)
+        except Exception:
+            logger.warning("Could not flush request metrics", exc_info=True)
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        cache = caches['default']
+        views = cache.get(VIEW_INDEX_KEY) or set()
+        fields = list(METRICS) + [f'bucket_{i}' for i in range(len(HISTOGRAM_BUCKETS_MS) + 1)]
+        cache.delete_many([_key(view, field) for view in views for field in fields] + [VIEW_INDEX_KEY])
+
+
+view_stats = ViewStats()
+
+
+def _percentile_ms(histogram, fraction):
+    """Upper bound of the bucket holding the ``fraction`` quantile (None above the last bound)."""
+    total = sum(histogram)
+    if not total:
+        return None
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= total * fraction:
+            return HISTOGRAM_BUCKETS_MS[index] if index < len(HISTOGRAM_BUCKETS_MS) else None
+    return None
+
+
+def view_report():
+    """Per-view aggregates, slowest total time first."""
+    view_stats.flush()
+    cache = caches['default']
+    views = sorted(cache.get(VIEW_INDEX_KEY) or ())
+    buckets = len(HISTOGRAM_BUCKETS_MS) + 1
+    fields = list(METRICS) + [f'bucket_{i}' for i in range(buckets)]
+    values = cache.get_many([_key(view, field) for view in views for field in fields])
+
+    report = []
+    for view in views:
+        row = {field: values.get(_key(view, field), 0) for field in METRICS}
+        requests = row['requests']
+        if not requests:
+            continue
+        histogram = [values.get(_key(view, f'bucket_{i}'), 0) for i in range(buckets)]
+        row.update(
+            view=view,
+            avg_ms=round(row['time_ms'] / requests, 1),
+            avg_queries=round(row['queries'] / requests, 1),
+            avg_db_ms=round(row['db_ms'] / requests, 1),
+            p50_ms=_percentile_ms(histogram, 0.5),
+            p95_ms=_percentile_ms(histogram, 0.95),
+            histogram=dict(zip([f'<={b}' for b in HISTOGRAM_BUCKETS_MS] + [f'>{HISTOGRAM_BUCKETS_MS[-1]}'], histogram)),
+        )
+        report.append(row)
+    report.sort(key=lambda row: row['time_ms'], reverse=True)
+    return report
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _setting('PERF_MONITORING', True):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(profile), _CountingCache(caches['default'], profile):
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+        view_stats.add(view, elapsed_ms, profile)
+
+        if (elapsed_ms >= _setting('PERF_SLOW_REQUEST_MS', 500)
+                or profile.queries >= _setting('PERF_QUERY_COUNT_THRESHOLD', 50)):
+            duplicates = ''.join(
+                f"\n  {count}x {sql[:300]}" for sql, count in profile.duplicate_statements()
+            )
+            logger.warning(
+                "Slow request %s %s (%s): %.0fms, %d queries in %.0fms, cache %d hits/%d misses%s",
+                request.method, request.path, view, elapsed_ms, profile.queries,
+                profile.db_time * 1000, profile.cache_hits, profile.cache_misses,
+                f"\n repeated SQL:{duplicates}" if duplicates else '',
+            )
+        return response
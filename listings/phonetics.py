@@ -0,0 +1,95 @@
+"""
+Phonetic keys for fuzzy city matching.
+
+Two keys are stored on every Property (``city_soundex`` and
+``city_phonetic``) when it is saved, so phonetic search is an indexed
+equality lookup instead of recomputing codes for every city on each request.
+
+- ``soundex``: classic 4-character Soundex (letter + 3 digits).
+- ``phonetic_key``: a transliteration-tolerant key for romanised Nepali
+  place names. Aspirated consonants are folded into their plain forms
+  (kh/k, th/t, dh/d, bh/b, ...), interior vowels are dropped and repeats
+  collapsed, so "Kathmandu"/"Katmandu" or "Bhaktapur"/"Bhaktpur" share a key.
+"""
+import re
+
+PHONETIC_KEY_LENGTH = 32
+
+_SOUNDEX_DIGITS = {
+    char: digit
+    for letters, digit in (
+        ('BFPV', '1'), ('CGJKQSXZ', '2'), ('DT', '3'),
+        ('L', '4'), ('MN', '5'), ('R', '6'),
+    )
+    for char in letters
+}
+_SOUNDEX_SEPARATORS = frozenset('AEIOUHWY')
+
+# longest first so "chh" wins over "ch"
+_DIGRAPHS = (
+    ('chh', 'c'), ('ch', 'c'), ('kh', 'k'), ('gh', 'g'), ('jh', 'j'),
+    ('th', 't'), ('dh', 'd'), ('ph', 'f'), ('bh', 'b'), ('sh', 's'),
+    ('ck', 'k'), ('ks', 'x'),
+)
+_SINGLE = str.maketrans({'w': 'v', 'z': 'j', 'q': 'k'})
+_DIGRAPH_RE = re.compile('|'.join(src for src, _ in _DIGRAPHS))
+_DIGRAPH_MAP = dict(_DIGRAPHS)
+_NON_ALPHA_RE = re.compile(r'[^a-z]')
+_VOWELS = frozenset('aeiouyh')
+
+
+def soundex(word):
+    """Generate Soundex code (4 chars: 1 letter + 3 digits)."""
+    word = (word or '').upper().strip()
+    if not word:
+        return "0000"
+
+    code = word[0]
+    prev_digit = None
+    for char in word[1:]:
+        if len(code) >= 4:
+            break
+        # Vowels (and H/W/Y) separate repeated digits but are not coded
+        if char in _SOUNDEX_SEPARATORS:
+            prev_digit = None
+            continue
+        digit = _SOUNDEX_DIGITS.get(char)
+        if digit and digit != prev_digit:
+            code += digit
+            prev_digit = digit
+
+    return (code + '000')[:4]
+
+
+def phonetic_key(word):
+    """Transliteration-tolerant key for romanised (Nepali) place names."""
+    word = _NON_ALPHA_RE.sub('', (word or '').lower())
+    if not word:
+        return ''
+    word = _DIGRAPH_RE.sub(lambda m: _DIGRAPH_MAP[m.group(0)], word).translate(_SINGLE)
+
+    key = [word[0]]
+    for char in word[1:]:
+        if char in _VOWELS or char == key[-1]:
+            continue
+        key.append(char)
+    return ''.join(key)[:PHONETIC_KEY_LENGTH]
+
+
+def backfill_phonetic_keys(batch_size=500):
+    """
+    Recompute stored phonetic keys for every property whose keys are stale.
+    Returns the number of rows updated.
+    """
+    from .models import Property as model
+
+    # finish reading before writing: no UPDATEs while the cursor is open
+    changed = []
+    rows = model.objects.order_by().only('id', 'city', 'city_soundex', 'city_phonetic')
+    for prop in rows.iterator(chunk_size=batch_size):
+        code, key = soundex(prop.city), phonetic_key(prop.city)
+        if (prop.city_soundex, prop.city_phonetic) != (code, key):
+            prop.city_soundex, prop.city_phonetic = code, key
+            changed.append(prop)
+    model.objects.bulk_update(changed, ['city_soundex', 'city_phonetic'], batch_size=batch_size)
+    return len(changed)
@@ -0,0 +1,68 @@
+"""
+Persisted popularity scores for the home page "featured" listings.
+
+Score (max 100):
+- Recent bookings (40 points): 10 per approved/pending booking in the last 30 days
+- Recency (30 points): one point per day younger than 30 days
+- Verified status (30 points)
+
+The stored ``Property.popularity_score`` is refreshed incrementally by the
+signals in ``listings.signals`` whenever a booking is created, deleted or
+changes status. Both time-based components decay daily, so the
+``refresh_popularity`` management command should be run periodically
+(e.g. nightly from cron) to recompute every row.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+POPULARITY_WINDOW_DAYS = 30
+POPULAR_BOOKING_STATUSES = ('approved', 'pending')
+
+
+def compute_popularity_score(recent_bookings, created_at, is_verified, today=None):
+    """Pure scoring function shared by the incremental and periodic paths."""
+    today = today or timezone.now().date()
+    booking_score = min(recent_bookings * 10, 40)
+    days_old = (today - created_at.date()).days
+    recency_score = max(0, 30 - days_old) if days_old <= 30 else 0
+    verified_bonus = 30 if is_verified else 0
+    return booking_score + recency_score + verified_bonus
+
+
+def _recent_bookings_filter(now):
+    return Q(
+        booking__created_at__gte=now - timedelta(days=POPULARITY_WINDOW_DAYS),
+        booking__status__in=POPULAR_BOOKING_STATUSES,
+    )
+
+
+def refresh_popularity(property_ids=None, batch_size=500):
+    """
+    Recompute and store popularity scores.
+
+    ``property_ids`` limits the refresh to specific rows (the incremental
+    path); ``None`` refreshes every property (the periodic path). Returns the
+    number of rows whose score changed.
+    """
+    from .models import Property
+
+    now = timezone.now()
+    today = now.date()
+    qs = Property.objects.order_by()
+    if property_ids is not None:
+        qs = qs.filter(id__in=list(property_ids))
+    rows = qs.annotate(
+        recent_bookings=Count('booking', filter=_recent_bookings_filter(now))
+    ).only('id', 'created_at', 'is_verified', 'popularity_score')
+
+    changed = []
+    for prop in rows.iterator(chunk_size=batch_size):
+        score = compute_popularity_score(prop.recent_bookings, prop.created_at, prop.is_verified, today)
+        if score != prop.popularity_score:
+            prop.popularity_score = score
+            changed.append(prop)
+    if changed:
+        Property.objects.bulk_update(changed, ['popularity_score'], batch_size=batch_size)
+    return len(changed)
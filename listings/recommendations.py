@@ -0,0 +1,84 @@
+"""
+Content-based "similar properties" recommendations.
+
+Scoring (unchanged from the original per-row Python loop):
+- Same city (case-insensitive): 40 points
+- Rent within +/-20% of the target: up to 30 points, closer is better
+- Same bedroom count: 15 points
+- Same bathroom count: 15 points
+Only candidates scoring at least 20 points are recommended.
+
+Instead of loading every verified property into Python, the whole pass runs
+in a single query: candidates that cannot reach the threshold are pruned in
+the WHERE clause (a candidate needs a city match, a rent inside the band, or
+both bedroom and bathroom matches to score 20), the remaining rows are scored
+column-wise by the database, and only the top ``limit`` rows are returned.
+"""
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Abs, Cast, Lower
+
+MIN_RECOMMENDATION_SCORE = 20
+PRICE_BAND = 0.2
+
+
+def recommendation_candidates(target):
+    """Verified properties other than ``target`` that can reach the minimum score."""
+    from .models import Property
+
+    rent = float(target.rent)
+    # widened by a cent so decimal rounding of the bounds can never prune a
+    # row the exact float check in score_candidates would accept
+    price_range = rent * PRICE_BAND + 0.01
+    return Property.objects.filter(is_verified=True).exclude(id=target.id).filter(
+        Q(city__iexact=target.city)
+        | Q(rent__gte=rent - price_range, rent__lte=rent + price_range)
+        | Q(bedrooms=target.bedrooms, bathrooms=target.bathrooms)
+    )
+
+
+def score_candidates(queryset, target):
+    """Annotate ``rec_score`` on ``queryset`` using the scoring rules above."""
+    rent = float(target.rent)
+    price_range = rent * PRICE_BAND
+    price_diff = Abs(Cast('rent', FloatField()) - Value(rent))
+
+    return queryset.annotate(
+        city_lower=Lower('city'),
+        rec_price_diff=price_diff,
+    ).annotate(
+        rec_score=(
+            Case(
+                When(city_lower=Value(target.city.lower()), then=Value(40.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            + Case(
+                When(
+                    rec_price_diff__lte=price_range,
+                    then=Value(30.0) * (Value(1.0) - F('rec_price_diff') / Value(price_range + 1)),
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            + Case(
+                When(bedrooms=target.bedrooms, then=Value(15)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            + Case(
+                When(bathrooms=target.bathrooms, then=Value(15)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ),
+    )
+
+
+def recommend_similar(target, limit=4):
+    """Return up to ``limit`` properties most similar to ``target``, best first."""
+    return list(
+        score_candidates(recommendation_candidates(target), target)
+        .filter(rec_score__gte=MIN_RECOMMENDATION_SCORE)
+        .select_related('cover_image')
+        .order_by('-rec_score', '-created_at')[:limit]
+    )
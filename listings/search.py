@@ -0,0 +1,182 @@
+"""
+Ranked full-text search over verified properties.
+
+On SQLite the ``listings_property_search`` FTS5 table (trigram tokenizer, so
+substring matches behave like ``icontains``) holds the searchable text of
+every verified property, keyed by property id. It is kept in sync by the
+signals in ``listings.signals`` and can be rebuilt with the
+``rebuild_search_index`` management command. SQLite builds older than 3.34
+have no trigram tokenizer; there the table is not created and writes to
+the index are skipped.
+
+A search is one query against that table that both matches and ranks rows
+with the original tier weights:
+
+    exact city 100, city prefix 80, city substring 60,
+    title 40, description 30, address 25
+
+Other database backends, and SQLite without the table, fall back to a single ORM query with the same
+ranking expressed as CASE/WHEN annotations.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+SEARCH_TABLE = 'listings_property_search'
+SEARCH_FIELDS = ('city', 'title', 'description', 'address')
+
+# trigram tokens need at least three characters to be matched by the index
+MIN_INDEXED_QUERY_LENGTH = 3
+
+_RANK_SQL = f"""
+    SELECT rowid,
+        CASE
+            WHEN lower(city) = %(q)s THEN 100
+            WHEN substr(lower(city), 1, length(%(q)s)) = %(q)s THEN 80
+            WHEN instr(lower(city), %(q)s) > 0 THEN 60
+            WHEN instr(lower(title), %(q)s) > 0 THEN 40
+            WHEN instr(lower(description), %(q)s) > 0 THEN 30
+            WHEN instr(lower(address), %(q)s) > 0 THEN 25
+            ELSE 0
+        END AS score
+    FROM {SEARCH_TABLE}
+    WHERE {{where}}
+    ORDER BY score DESC, rowid DESC
+    LIMIT %(limit)s
+"""
+
+
+def create_search_table(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='trigram')"
+        )
+
+
+def drop_search_table(conn):
+    global _search_table_present
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    _search_table_present = False
+
+
+def trigram_tokenizer_available():
+    """FTS5's trigram tokenizer ships with SQLite 3.34+."""
+    import sqlite3
+    return connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+_search_table_present = False
+
+
+def search_index_enabled():
+    global _search_table_present
+    if connection.vendor != 'sqlite':
+        return False
+    # the table is created by a migration; only look it up until it is found
+    if not _search_table_present:
+        _search_table_present = SEARCH_TABLE in connection.introspection.table_names()
+    return _search_table_present
+
+
+def index_properties(properties):
+    """Insert or refresh index rows for ``properties``; unverified ones are removed."""
+    if not search_index_enabled():
+        return
+    properties = list(properties)
+    if not properties:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [(p.pk,) for p in properties],
+        )
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+            [
+                (p.pk, p.city, p.title, p.description, p.address)
+                for p in properties
+                if p.is_verified
+            ],
+        )
+
+
+def unindex_property(property_id):
+    if not search_index_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [property_id])
+
+
+def rebuild_search_index(batch_size=1000):
+    """Repopulate the index from scratch. Returns the number of indexed properties."""
+    from .models import Property
+
+    if not trigram_tokenizer_available():
+        return 0
+    create_search_table(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    total = 0
+    batch = []
+    rows = Property.objects.filter(is_verified=True).only('id', 'is_verified', *SEARCH_FIELDS)
+    for prop in rows.iterator(chunk_size=batch_size):
+        batch.append(prop)
+        if len(batch) >= batch_size:
+            index_properties(batch)
+            total += len(batch)
+            batch = []
+    index_properties(batch)
+    return total + len(batch)
+
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _ranked_ids_fts(query, limit):
+    params = {'q': query, 'limit': limit}
+    if len(query) >= MIN_INDEXED_QUERY_LENGTH:
+        where = f"{SEARCH_TABLE} MATCH %(match)s"
+        params['match'] = _fts_phrase(query)
+    else:
+        # too short for trigrams: scan the (compact) index table instead
+        where = ' OR '.join(f"instr(lower({field}), %(q)s) > 0" for field in SEARCH_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(_RANK_SQL.format(where=where), params)
+        return [(pid, score) for pid, score in cursor.fetchall()]
+
+
+def _ranked_ids_orm(query, limit):
+    from .models import Property
+
+    score = Case(
+        When(city__iexact=query, then=Value(100)),
+        When(city__istartswith=query, then=Value(80)),
+        When(city__icontains=query, then=Value(60)),
+        When(title__icontains=query, then=Value(40)),
+        When(description__icontains=query, then=Value(30)),
+        When(address__icontains=query, then=Value(25)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    match = Q()
+    for field in SEARCH_FIELDS:
+        match |= Q(**{f'{field}__icontains': query})
+    rows = (
+        Property.objects.filter(match, is_verified=True)
+        .annotate(search_score=score)
+        .order_by('-search_score', '-id')
+        .values_list('id', 'search_score')[:limit]
+    )
+    return list(rows)
+
+
+def ranked_search(query, limit=20):
+    """Return up to ``limit`` (property id, score) pairs for ``query``, best first."""
+    query = query.strip().lower()
+    if not query:
+        return []
+    if search_index_enabled():
+        return _ranked_ids_fts(query, limit)
+    return _ranked_ids_orm(query, limit)
@@ -0,0 +1,145 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import invalidate_booking_participants
+from .images import refresh_cover_images
+from .models import Booking, EarlyExitRequest, Property, PropertyImage
+from .page_cache import bump_catalogue_version
+from .popularity import refresh_popularity
+from .search import index_properties, unindex_property
+from .stats import invalidate_user_stats
+
+
+def properties_bulk_updated(property_ids):
+    """
+    Refresh the derived data the receivers below maintain (popularity
+    score, cover image, search index, dashboard stats, page cache) for rows
+    changed with ``QuerySet.update()``/``bulk_update()``, which bypass
+    post_save. Costs a fixed number of queries regardless of the row count.
+    """
+    property_ids = list(property_ids)
+    if not property_ids:
+        return
+    refresh_popularity(property_ids)
+    refresh_cover_images(property_ids)
+    properties = list(
+        Property.objects.filter(pk__in=property_ids)
+        .only('id', 'landlord_id', 'is_verified', 'city', 'title', 'description', 'address')
+    )
+    index_properties(properties)
+    invalidate_user_stats(*{prop.landlord_id for prop in properties})
+    bump_catalogue_version()
+
+
+# =========================
+# POPULARITY SCORES
+# =========================
+@receiver(post_save, sender=Property)
+def property_saved_refresh_popularity(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_popularity([instance.pk])
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved_refresh_popularity(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.status_changed():
+        refresh_popularity([instance.property_id])
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted_refresh_popularity(sender, instance, **kwargs):
+    refresh_popularity([instance.property_id])
+
+
+# =========================
+# COVER IMAGES
+# =========================
+@receiver(post_save, sender=PropertyImage)
+def property_image_saved_refresh_cover(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    refresh_cover_images([instance.property_id])
+
+
+@receiver(post_delete, sender=PropertyImage)
+def property_image_deleted_refresh_cover(sender, instance, **kwargs):
+    refresh_cover_images([instance.property_id])
+
+
+# =========================
+# SEARCH INDEX
+# =========================
+@receiver(post_save, sender=Property)
+def property_saved_update_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_properties([instance])
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted_update_search_index(sender, instance, **kwargs):
+    unindex_property(instance.pk)
+
+
+# =========================
+# DASHBOARD STATS CACHE
+# =========================
+def _booking_user_ids(booking):
+    """(tenant_id, landlord_id) for a booking, without a query when the property is loaded."""
+    if Booking.property.is_cached(booking):
+        landlord_id = booking.property.landlord_id
+    else:
+        landlord_id = Property.objects.filter(pk=booking.property_id).values_list('landlord_id', flat=True).first()
+    return booking.tenant_id, landlord_id
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved_invalidate_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # counters only depend on which bookings exist and their status
+    if created or instance.status_changed():
+        invalidate_user_stats(*_booking_user_ids(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted_invalidate_stats(sender, instance, **kwargs):
+    invalidate_user_stats(*_booking_user_ids(instance))
+
+
+@receiver(post_save, sender=EarlyExitRequest)
+@receiver(post_delete, sender=EarlyExitRequest)
+def exit_request_changed_invalidate_stats(sender, instance, **kwargs):
+    invalidate_user_stats(*_booking_user_ids(instance.booking))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def property_changed_invalidate_stats(sender, instance, **kwargs):
+    invalidate_user_stats(instance.landlord_id)
+
+
+# =========================
+# BOOKING ACCESS CACHE
+# =========================
+@receiver(post_delete, sender=Booking)
+def booking_deleted_invalidate_participants(sender, instance, **kwargs):
+    invalidate_booking_participants(instance.pk)
+
+
+# =========================
+# CATALOGUE PAGE CACHE
+# =========================
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def catalogue_changed_bump_version(sender, raw=False, **kwargs):
+    if raw:
+        return
+    bump_catalogue_version()
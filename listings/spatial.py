@@ -0,0 +1,175 @@
+"""
+Spatial index for nearest-property search.
+
+Coordinates are projected onto the unit sphere as (x, y, z) vectors and stored
+in a k-d tree. The straight-line (chord) distance between two unit vectors is
+monotonic in the great-circle distance, so a Euclidean k-nearest-neighbour
+search over the tree returns exactly the same ordering as haversine, without
+the longitude wrap-around and pole problems of indexing raw lat/lon.
+
+``catalogue_index()`` keeps one tree over the located, verified catalogue in process
+memory, rebuilt the first time it is asked for after the catalogue version
+(``listings.page_cache``) changes; ``rank_by_distance`` in the views ranks
+``property_list`` location searches with it.
+"""
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+Coordinates = Tuple[float, float]
+Vector = Tuple[float, float, float]
+
+
+def to_unit_vector(coord: Coordinates) -> Vector:
+    """Convert a lat/lon pair (decimal degrees) to a point on the unit sphere."""
+    lat, lon = coord
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    """Convert a unit-sphere chord length to a great-circle distance in km."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class _Node:
+    __slots__ = ('pid', 'point', 'axis', 'left', 'right')
+
+    def __init__(self, pid, point, axis, left, right):
+        self.pid = pid
+        self.point = point
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+class SpatialIndex:
+    """
+    Static k-d tree over property coordinates.
+
+    Building is O(n log n); a k-nearest query is O(log n + k) on average.
+    The index is immutable - rebuild it when the underlying points change.
+    """
+
+    def __init__(self, points: Dict[int, Coordinates]):
+        items = [(pid, to_unit_vector(coord)) for pid, coord in points.items()]
+        self._size = len(items)
+        self._root = self._build(items, 0)
+
+    def __len__(self):
+        return self._size
+
+    def _build(self, items, depth) -> Optional[_Node]:
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[1][axis])
+        mid = len(items) // 2
+        pid, point = items[mid]
+        return _Node(
+            pid,
+            point,
+            axis,
+            self._build(items[:mid], depth + 1),
+            self._build(items[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, start: Coordinates, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Return up to ``k`` (property id, distance km) pairs closest to ``start``,
+        sorted by ascending distance.
+        """
+        if k <= 0 or self._root is None:
+            return []
+        k = min(k, self._size)
+        target = to_unit_vector(start)
+        # max-heap of the best k so far, stored as (-squared_distance, tiebreak, pid)
+        heap: List[Tuple[float, int, int]] = []
+        counter = 0
+        stack = [self._root]
+
+        # Iterative depth-first descent; the near side is always pushed last
+        # so it is explored first and tightens the pruning radius early.
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            px, py, pz = node.point
+            d2 = (px - target[0]) ** 2 + (py - target[1]) ** 2 + (pz - target[2]) ** 2
+            if len(heap) < k:
+                heapq.heappush(heap, (-d2, counter, node.pid))
+                counter += 1
+            elif d2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-d2, counter, node.pid))
+                counter += 1
+
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            if far is not None and (len(heap) < k or diff * diff < -heap[0][0]):
+                stack.append(far)
+            stack.append(near)
+
+        ordered = sorted(((-neg_d2, tie, pid) for neg_d2, tie, pid in heap))
+        return [(pid, chord_to_km(math.sqrt(d2))) for d2, _, pid in ordered]
+
+    def within(self, start: Coordinates, radius_km: float) -> List[Tuple[int, float]]:
+        """Return all (property id, distance km) pairs within ``radius_km``, nearest first."""
+        if self._root is None or radius_km < 0:
+            return []
+        target = to_unit_vector(start)
+        # chord length corresponding to the great-circle radius
+        max_chord = 2 * math.sin(min(math.pi, radius_km / EARTH_RADIUS_KM) / 2)
+        max_d2 = max_chord * max_chord
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            px, py, pz = node.point
+            d2 = (px - target[0]) ** 2 + (py - target[1]) ** 2 + (pz - target[2]) ** 2
+            if d2 <= max_d2:
+                found.append((d2, node.pid))
+            diff = target[node.axis] - node.point[node.axis]
+            if diff < 0:
+                stack.append(node.left)
+                if diff * diff <= max_d2:
+                    stack.append(node.right)
+            else:
+                stack.append(node.right)
+                if diff * diff <= max_d2:
+                    stack.append(node.left)
+        found.sort()
+        return [(pid, chord_to_km(math.sqrt(d2))) for d2, pid in found]
+
+
+# (catalogue version, index) for this process
+_catalogue_index = (None, None)
+
+
+def catalogue_index() -> SpatialIndex:
+    """
+    Index over every verified property with coordinates, current for the
+    catalogue version. Any Property change bumps the version
+    (``listings.signals``), so the next call rebuilds the tree; until then
+    queries cost no SQL.
+    """
+    global _catalogue_index
+    from .models import Property
+    from .page_cache import catalogue_version
+
+    version = catalogue_version()
+    built_for, index = _catalogue_index
+    if index is None or built_for != version:
+        index = SpatialIndex({
+            pid: (lat, lng)
+            for pid, lat, lng in Property.objects.filter(
+                is_verified=True, latitude__isnull=False, longitude__isnull=False,
+            ).order_by().values_list('id', 'latitude', 'longitude')
+        })
+        _catalogue_index = (version, index)
+    return index
@@ -0,0 +1,83 @@
+"""
+Role-specific dashboard counters shared by ``home()`` and
+``users.views.dashboard``.
+
+Each model is counted in one ``aggregate(Count(..., filter=Q(...)))`` round
+trip, and the resulting dict is cached per user. The signals in
+``listings.signals`` drop the cached entry whenever a booking, early-exit
+request or property belonging to the user changes.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+STATS_CACHE_TIMEOUT = 300
+
+
+def _cache_key(role, user_id):
+    return f'dashboard-stats:{role}:{user_id}'
+
+
+def invalidate_user_stats(*user_ids):
+    keys = [
+        _cache_key(role, user_id)
+        for user_id in user_ids if user_id
+        for role in ('tenant', 'landlord')
+    ]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _compute_tenant_stats(user_id):
+    from .models import Booking, EarlyExitRequest
+
+    stats = Booking.objects.filter(tenant_id=user_id).aggregate(
+        total_bookings=Count('id'),
+        pending_bookings=Count('id', filter=Q(status='pending')),
+        approved_bookings=Count('id', filter=Q(status='approved')),
+        rejected_bookings=Count('id', filter=Q(status='rejected')),
+        active_bookings=Count('id', filter=Q(status__in=['approved', 'rented_out'])),
+    )
+    stats.update(EarlyExitRequest.objects.filter(booking__tenant_id=user_id).aggregate(
+        exit_requests=Count('id'),
+        pending_exits=Count('id', filter=Q(status='requested')),
+    ))
+    return stats
+
+
+def _compute_landlord_stats(user_id):
+    from .models import Booking, EarlyExitRequest, Property
+
+    stats = Property.objects.filter(landlord_id=user_id).aggregate(
+        total_properties=Count('id'),
+        verified_properties=Count('id', filter=Q(is_verified=True)),
+        unverified_properties=Count('id', filter=Q(is_verified=False)),
+    )
+    stats.update(Booking.objects.filter(property__landlord_id=user_id).aggregate(
+        total_booking_requests=Count('id'),
+        pending_booking_requests=Count('id', filter=Q(status='pending')),
+        active_tenants=Count('id', filter=Q(status='rented_out')),
+    ))
+    stats.update(EarlyExitRequest.objects.filter(booking__property__landlord_id=user_id).aggregate(
+        exit_requests=Count('id'),
+        pending_exit_requests=Count('id', filter=Q(status='requested')),
+    ))
+    return stats
+
+
+def get_tenant_stats(user):
+    key = _cache_key('tenant', user.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_tenant_stats(user.pk)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def get_landlord_stats(user):
+    key = _cache_key('landlord', user.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_landlord_stats(user.pk)
+        cache.set(key, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
@@ -0,0 +1,40 @@
+"""
+``{% cache_fragment name [vary_on ...] %} ... {% endcache_fragment %}``
+
+Like Django's ``{% cache %}``, but keyed on the catalogue version (see
+``listings.page_cache``), so a fragment is invalidated as soon as any
+listing, photo or booking changes, and counted in the fragment hit/miss
+statistics.
+"""
+from django import template
+from django.core.cache import cache
+
+from listings.page_cache import FRAGMENT_CACHE_TIMEOUT, fragment_cache_key, record
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = fragment_cache_key(self.name, [var.resolve(context) for var in self.vary_on])
+        value = cache.get(key)
+        record('fragment', hit=value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, FRAGMENT_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag
+def cache_fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endcache_fragment',))
+    parser.delete_first_token()
+    return CacheFragmentNode(nodelist, bits[1], [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,73 @@
+"""
+Responsive property photos.
+
+``{% card_image image alt %}`` renders a ``<picture>`` whose WebP and JPEG
+``srcset`` list every rendition of a ``PropertyImage`` with its width, so
+the browser downloads the smallest one that fills the card. ``size`` picks
+the rendition used as the plain ``src`` (``full`` for the detail gallery,
+``thumb`` for small previews) and ``css_class``/``style`` go on the
+``<img>``. Until the background pool has produced the renditions, a plain
+``<img>`` of the original upload is rendered instead; rendering never
+happens on the request path.
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from listings.images import RENDITION_FORMATS, RENDITION_SIZES
+
+register = template.Library()
+
+# grid cards: one column on phones, two on tablets, three on desktops
+CARD_SIZES = '(max-width: 576px) 100vw, (max-width: 992px) 50vw, 33vw'
+
+
+def _candidate(image, name, fmt):
+    """(url, width) of one processed rendition."""
+    rendition = image.renditions[name]
+    return image.image.storage.url(rendition[fmt]), rendition['width']
+
+
+def _renditions_ready(image):
+    renditions = image.renditions or {}
+    return all(
+        renditions.get(name, {}).get(fmt) for name, _ in RENDITION_SIZES for fmt, _, _ in RENDITION_FORMATS
+    )
+
+
+def rendition_srcset(image, fmt):
+    """``srcset`` value listing each rendition of ``image`` in ``fmt``, smallest first."""
+    return ', '.join(
+        '{} {}w'.format(*_candidate(image, name, fmt)) for name, _ in reversed(RENDITION_SIZES)
+    )
+
+
+def _img_attrs(css_class, style):
+    return format_html_join('', ' {}="{}"', ((name, value) for name, value in (
+        ('class', css_class), ('style', style)) if value))
+
+
+@register.simple_tag
+def card_image(image, alt='', sizes=CARD_SIZES, size='card', css_class='', style='', loading='lazy'):
+    attrs = _img_attrs(css_class, style)
+    if not _renditions_ready(image):
+        # still pending in the background pool: serve the original for now
+        return format_html(
+            '<img src="{}"{} alt="{}" loading="{}" decoding="async">',
+            image.image.url, attrs, alt, loading,
+        )
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, rendition_srcset(image, fmt), sizes) for fmt, _, _ in RENDITION_FORMATS if fmt != 'jpeg'),
+    )
+    return format_html(
+        '<picture style="display: contents;">{}'
+        '<img src="{}" srcset="{}" sizes="{}"{} alt="{}" loading="{}" decoding="async">'
+        '</picture>',
+        sources,
+        _candidate(image, size, 'jpeg')[0],
+        rendition_srcset(image, 'jpeg'),
+        sizes,
+        attrs,
+        alt,
+        loading,
+    )
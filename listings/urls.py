@@ -22,6 +22,7 @@ urlpatterns = [
 
     # Booking messaging & actions (must come before generic manage_booking pattern)
     path('booking/<int:booking_id>/messages/', views.booking_messages, name='booking_messages'),
+    path('booking/<int:booking_id>/messages/history/', views.booking_messages_history, name='booking_messages_history'),
     path('booking/<int:booking_id>/detail/', views.booking_detail, name='booking_detail'),
     path('booking/<int:booking_id>/cancel/', views.cancel_booking, name='cancel_booking'),
     path('booking/<int:booking_id>/finalize/', views.finalize_booking, name='finalize_booking'),
@@ -60,6 +61,9 @@ urlpatterns = [
     path('admin/verifications/', admin_views.admin_verifications, name='admin_verifications'),
     path('admin/settlements/', admin_views.admin_settlements, name='admin_settlements'),
     path('admin/users/', admin_views.admin_users, name='admin_users'),
+    path('admin/cache-stats/', admin_views.admin_cache_stats, name='admin_cache_stats'),
+    path('admin/perf/', admin_views.admin_perf, name='admin_perf'),
+    path('admin/email-queue/', admin_views.admin_email_queue, name='admin_email_queue'),
     path('admin/verification/<int:verification_id>/review/', admin_views.verify_property, name='verify_property'),
     path('admin/property/<int:property_id>/toggle-verification/', admin_views.toggle_property_verification, name='toggle_property_verification'),
 
@@ -1,5 +1,6 @@
+import heapq
 import math
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 Coordinates = Tuple[float, float]
 
@@ -56,7 +57,31 @@ def dijkstra(start: Coordinates, points: Dict[int, Coordinates]) -> Dict[int, fl
 
 
 def nearest_properties(start: Coordinates, prop_coords: Dict[int, Coordinates], k: int = 10) -> List[int]:
-    """Return list of property ids sorted by distance from start."""
-    dists = dijkstra(start, prop_coords)
-    sorted_ids = sorted(dists, key=lambda pid: dists[pid])
-    return sorted_ids[:k]
+    """Return list of property ids sorted by distance from start.
+
+    A single O(n log k) haversine scan instead of the O(n^2) relaxation done
+    by ``dijkstra``, for an arbitrary set of points. Searches over the
+    catalogue use the cached ``listings.spatial.catalogue_index()`` instead.
+    """
+    return heapq.nsmallest(k, prop_coords, key=lambda pid: haversine(start, prop_coords[pid]))
+
+
+def bounding_box(center: Coordinates, radius_km: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_km.
+
+    The box is a cheap, index-friendly prefilter; callers still need an exact
+    haversine check on the survivors. The longitude bounds are None when the
+    circle reaches a pole or crosses the antimeridian, in which case only the
+    latitude bounds should be applied.
+    """
+    lat, lng = center
+    dlat = math.degrees(radius_km / 6371.0)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+    # widest longitude span of the circle occurs at the latitude nearest the pole
+    dlng = math.degrees(math.asin(min(1.0, math.sin(radius_km / 6371.0) / math.cos(math.radians(lat)))))
+    min_lng, max_lng = lng - dlng, lng + dlng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lng, max_lng
@@ -3,15 +3,14 @@ from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.core.mail import send_mail
+from django.http import JsonResponse
 from django.conf import settings
-from django.db.models import Exists, OuterRef, Q, Avg, Count, F
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Avg, F
 from django.db.models.functions import Abs
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
-from PIL import Image
-from io import BytesIO
 
 from .models import (
     Property,
@@ -32,83 +31,18 @@ from .forms import (
     InspectionSubmissionForm,
     SettlementActionForm,
 )
-from users.models import Notification
-
-
-# ============ Image Validation Utilities ============
-
-def validate_image_file(image_file):
-    """
-    Validate image file: size, dimensions, format.
-    Returns: (is_valid, error_message, image_info)
-    """
-    try:
-        # Max file size: 5MB
-        MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
-        if image_file.size > MAX_FILE_SIZE:
-            return False, f"File size {image_file.size / (1024*1024):.1f}MB exceeds 5MB limit.", None
-        
-        # Check file extension
-        allowed_exts = ['.jpg', '.jpeg', '.png', '.gif']
-        file_name = image_file.name.lower()
-        if not any(file_name.endswith(ext) for ext in allowed_exts):
-            return False, "Only JPG, PNG, and GIF formats are allowed.", None
-        
-        # Validate image dimensions
-        img = Image.open(image_file)
-        width, height = img.size
-        
-        # Min dimensions: 640x480
-        if width < 640 or height < 480:
-            return False, f"Image too small. Minimum 640x480px, got {width}x{height}px.", None
-        
-        # Max dimensions: 4000x3000
-        if width > 4000 or height > 3000:
-            return False, f"Image too large. Maximum 4000x3000px, got {width}x{height}px.", None
-        
-        return True, None, {'width': width, 'height': height, 'format': img.format}
-    
-    except Exception as e:
-        return False, f"Invalid image file: {str(e)}", None
-
-
-def save_and_optimize_image(image_file):
-    """
-    Save and optimize image to ensure quality.
-    Converts to RGB if needed, maintains aspect ratio.
-    Returns: optimized image file
-    """
-    try:
-        img = Image.open(image_file)
-        
-        # Convert RGBA to RGB (preserves quality)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        
-        # Save to BytesIO with quality settings
-        output = BytesIO()
-        img.save(output, format='JPEG', quality=90, optimize=True)
-        output.seek(0)
-        
-        # Create a new InMemoryUploadedFile with the optimized image
-        from django.core.files.uploadedfile import InMemoryUploadedFile
-        optimized_file = InMemoryUploadedFile(
-            output, 'ImageField',
-            f"{image_file.name.split('.')[0]}.jpg",
-            'image/jpeg',
-            output.getbuffer().nbytes,
-            None
-        )
-        return optimized_file
-    
-    except Exception as e:
-        # If optimization fails, return original
-        return image_file
+from .access import booking_role, is_booking_participant
+from .availability import available_properties, check_and_reserve
+from .chat import HISTORY_PAGE_SIZE, history_page, serialize_message
+from .images import store_uploads, validate_upload
+from .outbox import enqueue_email
+from .page_cache import anonymous_page_cache
+from .stats import get_landlord_stats, get_tenant_stats
 from users.models import CustomUser
+from users.notifications import notify, notify_many
 
 
+@anonymous_page_cache('page')
 def home(request):
     bookings = None
     owner_properties = []
@@ -120,15 +54,7 @@ def home(request):
         bookings = Booking.objects.filter(
             tenant=request.user
         ).select_related('property').order_by('-created_at')
-        exit_requests = EarlyExitRequest.objects.filter(booking__tenant=request.user)
-        stats = {
-            'total_bookings': bookings.count(),
-            'pending_bookings': bookings.filter(status='pending').count(),
-            'approved_bookings': bookings.filter(status='approved').count(),
-            'rejected_bookings': bookings.filter(status='rejected').count(),
-            'exit_requests': exit_requests.count(),
-            'pending_exits': exit_requests.filter(status='requested').count(),
-        }
+        stats = get_tenant_stats(request.user)
 
     # OWNER DATA
     if request.user.is_authenticated and request.user.is_landlord:
@@ -154,17 +80,7 @@ def home(request):
             property__landlord=request.user
         ).select_related('property', 'tenant').order_by('-created_at')
 
-        landlord_exits = EarlyExitRequest.objects.filter(booking__property__landlord=request.user)
-
-        stats = {
-            'total_properties': owner_properties.count(),
-            'verified_properties': owner_properties.filter(is_verified=True).count(),
-            'unverified_properties': owner_properties.filter(is_verified=False).count(),
-            'total_booking_requests': landlord_bookings.count(),
-            'pending_booking_requests': landlord_bookings.filter(status='pending').count(),
-            'exit_requests': landlord_exits.count(),
-            'pending_exit_requests': landlord_exits.filter(status='requested').count(),
-        }
+        stats = get_landlord_stats(request.user)
 
     # FEATURED PROPERTIES WITH POPULARITY ALGORITHM
     featured_properties = get_popular_properties(limit=6)
@@ -189,14 +105,8 @@ def home(request):
 
 
 def _notify_admins(title: str, message: str, target_url: str = "/admin/"):
-    for admin_user in CustomUser.objects.filter(is_superuser=True, is_active=True):
-        Notification.objects.create(
-            recipient=admin_user,
-            actor=None,
-            title=title,
-            message=message,
-            target_url=target_url,
-        )
+    admin_ids = CustomUser.objects.filter(is_superuser=True, is_active=True).values_list('pk', flat=True)
+    notify_many(admin_ids, title=title, message=message, target_url=target_url)
 
 
 @login_required
@@ -232,7 +142,7 @@ def request_property_verification(request, property_id):
             )
 
             # Notify landlord
-            Notification.objects.create(
+            notify(
                 recipient=request.user,
                 actor=request.user,
                 title="Verification request submitted",
@@ -266,7 +176,7 @@ def request_early_exit(request, booking_id):
             ex.booking = booking
             ex.status = 'requested'
             ex.save()
-            Notification.objects.create(
+            notify(
                 recipient=booking.property.landlord,
                 actor=request.user,
                 title='Early exit requested',
@@ -281,9 +191,9 @@ def request_early_exit(request, booking_id):
 
 @login_required
 def early_exit_detail(request, exit_id):
-    ex = get_object_or_404(EarlyExitRequest, pk=exit_id)
+    ex = get_object_or_404(EarlyExitRequest.objects.select_related('booking__property__landlord'), pk=exit_id)
     # ensure only tenant or owner or admin
-    if request.user not in [ex.booking.tenant, ex.booking.property.landlord] and not request.user.is_superuser:
+    if not is_booking_participant(request.user, ex.booking_id) and not request.user.is_superuser:
         return redirect('home')
     # display status and actions depending on role
     return render(request, 'listings/early_exit_detail.html', {'exit': ex})
@@ -292,7 +202,7 @@ def early_exit_detail(request, exit_id):
 @login_required
 def owner_review_exit(request, exit_id, action):
     ex = get_object_or_404(EarlyExitRequest, pk=exit_id)
-    if request.user != ex.booking.property.landlord:
+    if booking_role(request.user, ex.booking_id) != 'landlord':
         return redirect('home')
     if request.method != 'POST':
         return redirect('early_exit_detail', exit_id)
@@ -303,8 +213,8 @@ def owner_review_exit(request, exit_id, action):
         ex.status = 'owner_approved'
         ex.owner_response_date = timezone.now()
         ex.save()
-        Notification.objects.create(
-            recipient=ex.booking.tenant,
+        notify(
+            recipient=ex.booking.tenant_id,
             actor=request.user,
             title='Early exit approved',
             message=f"Your early exit request for booking #{ex.booking.id} was approved.",
@@ -315,8 +225,8 @@ def owner_review_exit(request, exit_id, action):
         ex.owner_response_date = timezone.now()
         ex.owner_comments = request.POST.get('comments','')
         ex.save()
-        Notification.objects.create(
-            recipient=ex.booking.tenant,
+        notify(
+            recipient=ex.booking.tenant_id,
             actor=request.user,
             title='Early exit rejected',
             message=f"Your early exit request for booking #{ex.booking.id} was rejected.",
@@ -328,7 +238,7 @@ def owner_review_exit(request, exit_id, action):
 @login_required
 def schedule_inspection(request, exit_id):
     ex = get_object_or_404(EarlyExitRequest, pk=exit_id)
-    if request.user != ex.booking.property.landlord and not request.user.is_superuser:
+    if booking_role(request.user, ex.booking_id) != 'landlord' and not request.user.is_superuser:
         return redirect('home')
     # only schedule when owner_approved
     if ex.status != 'owner_approved':
@@ -343,8 +253,8 @@ def schedule_inspection(request, exit_id):
             insp.save()
             ex.status = 'inspection_scheduled'
             ex.save()
-            Notification.objects.create(
-                recipient=ex.booking.tenant,
+            notify(
+                recipient=ex.booking.tenant_id,
                 actor=request.user,
                 title='Inspection scheduled',
                 message=f"Inspection for your early exit request #{ex.id} has been scheduled.",
@@ -359,7 +269,7 @@ def schedule_inspection(request, exit_id):
 @login_required
 def submit_inspection_report(request, exit_id):
     ex = get_object_or_404(EarlyExitRequest, pk=exit_id)
-    if request.user != ex.booking.tenant and request.user != ex.booking.property.landlord:
+    if not is_booking_participant(request.user, ex.booking_id):
         return redirect('home')
     insp = getattr(ex, 'inspection', None)
     if not insp or insp.status != 'pending':
@@ -391,8 +301,8 @@ def submit_inspection_report(request, exit_id):
             ex.save()
             # create settlement draft
             Settlement.objects.create(exit_request=ex, lease=ex.booking)
-            Notification.objects.create(
-                recipient=ex.booking.tenant,
+            notify(
+                recipient=ex.booking.tenant_id,
                 actor=request.user,
                 title='Inspection completed',
                 message=f"Inspection for exit request #{ex.id} completed. Settlement draft is ready.",
@@ -411,13 +321,14 @@ def view_settlement(request, exit_id):
     if not settlement:
         return redirect('early_exit_detail', exit_id)
 
-    if request.user not in [ex.booking.tenant, ex.booking.property.landlord] and not request.user.is_superuser:
+    role = booking_role(request.user, ex.booking_id)
+    if role is None and not request.user.is_superuser:
         return redirect('home')
 
     if request.method == 'POST':
         # Manual payment: tenant uploads proof (after settlement completed)
         if request.POST.get('intent') == 'upload_proof':
-            if request.user != ex.booking.tenant:
+            if role != 'tenant':
                 return redirect('view_settlement', exit_id)
             proof = request.FILES.get('tenant_payment_proof')
             ref = (request.POST.get('tenant_payment_reference') or '').strip()
@@ -430,8 +341,8 @@ def view_settlement(request, exit_id):
             settlement.tenant_payment_submitted_at = timezone.now()
             settlement.payment_status = 'processing'
             settlement.save()
-            Notification.objects.create(
-                recipient=ex.booking.property.landlord,
+            notify(
+                recipient=ex.booking.property.landlord_id,
                 actor=request.user,
                 title='Payment proof submitted',
                 message=f"Payment proof submitted for settlement on exit #{ex.id}.",
@@ -441,7 +352,7 @@ def view_settlement(request, exit_id):
 
         # Manual payment: owner confirms receipt
         if request.POST.get('intent') == 'confirm_receipt':
-            if request.user != ex.booking.property.landlord:
+            if role != 'landlord':
                 return redirect('view_settlement', exit_id)
             note = (request.POST.get('owner_receipt_note') or '').strip()
             settlement.owner_receipt_note = note
@@ -449,8 +360,8 @@ def view_settlement(request, exit_id):
             settlement.payment_status = 'completed'
             settlement.payment_completed_at = timezone.now()
             settlement.save()
-            Notification.objects.create(
-                recipient=ex.booking.tenant,
+            notify(
+                recipient=ex.booking.tenant_id,
                 actor=request.user,
                 title='Payment confirmed',
                 message=f"Owner confirmed receipt for settlement on exit #{ex.id}.",
@@ -464,10 +375,10 @@ def view_settlement(request, exit_id):
             action = form.cleaned_data['action']
             comments = form.cleaned_data['comments']
             if action == 'accept':
-                if request.user == ex.booking.tenant:
+                if role == 'tenant':
                     # If owner already accepted, complete
                     settlement.status = 'completed' if settlement.status == 'owner_accepted' else 'tenant_accepted'
-                elif request.user == ex.booking.property.landlord:
+                elif role == 'landlord':
                     settlement.status = 'completed' if settlement.status == 'tenant_accepted' else 'owner_accepted'
                 else:
                     form.add_error(None, 'Only the tenant or owner may accept the settlement.')
@@ -493,45 +404,81 @@ def get_popular_properties(limit=6):
     - Recent bookings (40% weight)
     - Recent creation (30% weight) 
     - Verified status (30% weight)
-    """
-    from django.utils import timezone
-    from datetime import timedelta
 
-    # Calculate scores for properties
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-
-    # Annotate properties with popularity scores
-    properties = Property.objects.filter(is_verified=True).annotate(
-        # Recent bookings count (last 30 days)
-        recent_bookings=Count(
-            'booking',
-            filter=Q(
-                booking__created_at__gte=thirty_days_ago,
-                booking__status__in=['approved', 'pending']
-            )
-        )
+    Scores are precomputed in ``Property.popularity_score`` (see
+    ``listings.popularity``), so this is an indexed ORDER BY ... LIMIT.
+    """
+    return list(
+        Property.objects.filter(is_verified=True)
+        .select_related('cover_image')
+        .order_by('-popularity_score', '-created_at')[:limit]
     )
 
-    # Calculate final scores
-    scored_properties = []
-    for prop in properties:
-        # Normalize scores
-        booking_score = min(prop.recent_bookings * 10, 40)  # Max 40 points for bookings
-        
-        # Recency score (newer properties get higher scores)
-        days_old = (timezone.now().date() - prop.created_at.date()).days
-        recency_score = max(0, 30 - days_old) if days_old <= 30 else 0  # Max 30 points for recency
-        
-        verified_bonus = 30 if prop.is_verified else 0  # 30 points for verified
 
-        total_score = booking_score + recency_score + verified_bonus
-        scored_properties.append((prop, total_score))
+class DistanceRankedResults:
+    """
+    Lazy, paginator-friendly sequence of properties ordered by distance.
+
+    Holds only (id, distance) pairs; Property rows are fetched one page at a
+    time when the paginator slices the sequence, and each fetched object gets
+    a ``distance_km`` attribute for the template.
+    """
+
+    def __init__(self, ranked, queryset):
+        self._ranked = ranked
+        self._queryset = queryset
+
+    def __len__(self):
+        return len(self._ranked)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError('DistanceRankedResults index out of range')
+            return self[index:index + 1][0]
+        window = self._ranked[index]
+        by_id = self._queryset.in_bulk([pid for pid, _ in window])
+        results = []
+        for pid, dist in window:
+            prop = by_id.get(pid)
+            if prop is not None:
+                prop.distance_km = dist
+                results.append(prop)
+        return results
+
+
+def rank_by_distance(properties, origin, radius_km=None, narrowed=True):
+    """
+    Order a subset of the verified catalogue by distance from ``origin``
+    (lat, lng).
+
+    Candidates come from the cached k-d tree in ``listings.spatial`` (only
+    those within ``radius_km`` when given). When ``narrowed`` (search terms
+    or filters were applied to ``properties``) one id-only query keeps the
+    candidates the queryset matches; otherwise ranking costs no query at
+    all. Full rows are loaded per page by DistanceRankedResults.
+    """
+    from .spatial import catalogue_index
+    index = catalogue_index()
+    if radius_km is not None:
+        candidates = index.within(origin, radius_km)
+    else:
+        candidates = index.nearest(origin, k=len(index))
+    if narrowed:
+        allowed = properties if radius_km is None else properties.filter(id__in=[pid for pid, _ in candidates])
+        allowed = set(allowed.order_by().values_list('id', flat=True))
+        candidates = [(pid, dist) for pid, dist in candidates if pid in allowed]
+    return DistanceRankedResults(candidates, properties)
 
-    # Sort by score and return top properties
-    scored_properties.sort(key=lambda x: x[1], reverse=True)
-    return [prop for prop, score in scored_properties[:limit]]
 
+PROPERTY_LIST_PAGE_SIZE = 10
 
+
+@anonymous_page_cache(
+    'q', 'city', 'max_rent', 'sort', 'lat', 'lng', 'radius_km', 'check_in', 'check_out', 'page',
+)
 def property_list(request):
     query = request.GET.get('q', '').strip()  # General search query
     city = request.GET.get('city', '').strip()
@@ -539,38 +486,19 @@ def property_list(request):
     sort = request.GET.get('sort', 'newest').strip()
     lat = request.GET.get('lat')
     lng = request.GET.get('lng')
+    radius_km = request.GET.get('radius_km', '').strip()
+    check_in = request.GET.get('check_in', '').strip()
+    check_out = request.GET.get('check_out', '').strip()
 
     # Use fuzzy search if there's a general query
     if query:
-        properties = fuzzy_search_properties(query)
-        # Convert to queryset for further filtering
-        property_ids = [p.id for p in properties]
+        # Ranked ids only; rows are loaded by the paginated queryset below
+        property_ids = fuzzy_search_ids(query)
         properties = Property.objects.filter(id__in=property_ids)
     else:
         properties = Property.objects.filter(is_verified=True)
-
-    # if location provided perform distance ranking
-    distance_ordered = False
-    if lat and lng:
-        try:
-            lat_f = float(lat)
-            lng_f = float(lng)
-            # gather coords from filtered queryset
-            coords = {
-                p.id: (p.latitude, p.longitude)
-                for p in properties
-                if p.latitude is not None and p.longitude is not None
-            }
-            # compute ordering
-            from .utils import nearest_properties
-            ordered_ids = nearest_properties((lat_f, lng_f), coords, k=properties.count())
-            # preserve initial filtering by using Case/When for ordering
-            from django.db.models import Case, When
-            preserved = Case(*[When(pk=pid, then=pos) for pos, pid in enumerate(ordered_ids)])
-            properties = properties.filter(id__in=ordered_ids).order_by(preserved)
-            distance_ordered = True
-        except ValueError:
-            pass
+    # cards show the cover photo; one JOIN instead of a query per card
+    properties = properties.select_related('cover_image')
 
     # Apply additional filters
     if city:
@@ -583,45 +511,63 @@ def property_list(request):
         except ValueError:
             pass  # Ignore invalid max_rent values
 
-    # Sorting
-    if not distance_ordered:
+    # Only properties free for the whole stay (single NOT EXISTS anti-join)
+    if check_in and check_out:
+        try:
+            check_in_date = date.fromisoformat(check_in)
+            check_out_date = date.fromisoformat(check_out)
+            if check_in_date < check_out_date:
+                properties = available_properties(check_in_date, check_out_date, properties)
+        except ValueError:
+            pass  # Ignore invalid dates
+
+    # if location provided perform distance ranking
+    origin = None
+    if lat and lng:
+        try:
+            origin = (float(lat), float(lng))
+        except ValueError:
+            origin = None
+
+    radius_val = None
+    if origin and radius_km:
+        try:
+            radius_val = float(radius_km)
+            if radius_val <= 0:
+                radius_val = None
+        except ValueError:
+            radius_val = None
+
+    if origin:
+        narrowed = bool(query or city or max_rent or (check_in and check_out))
+        results = rank_by_distance(properties, origin, radius_val, narrowed)
+    else:
+        # Sorting
         if sort == 'rent_low':
-            properties = properties.order_by('rent', '-created_at')
+            results = properties.order_by('rent', '-created_at')
         elif sort == 'rent_high':
-            properties = properties.order_by('-rent', '-created_at')
+            results = properties.order_by('-rent', '-created_at')
         else:
-            properties = properties.order_by('-created_at')
+            results = properties.order_by('-created_at')
 
     # Pagination
-    paginator = Paginator(properties, 10)  # 10 properties per page
+    paginator = Paginator(results, PROPERTY_LIST_PAGE_SIZE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Attach distance for UI (optional badge) when lat/lng provided.
-    # This keeps templates simple and avoids DB-specific math in SQLite.
-    if lat and lng:
-        try:
-            lat_f = float(lat)
-            lng_f = float(lng)
-            from .utils import haversine
-            for p in page_obj.object_list:
-                if p.latitude is not None and p.longitude is not None:
-                    p.distance_km = haversine((lat_f, lng_f), (p.latitude, p.longitude))
-                else:
-                    p.distance_km = None
-        except ValueError:
-            for p in page_obj.object_list:
-                p.distance_km = None
-
     return render(request, 'listings/property_list.html', {
         'page_obj': page_obj,
         'search_query': query,
         'city_filter': city,
         'max_rent_filter': max_rent,
+        'radius_filter': radius_km,
+        'check_in_filter': check_in,
+        'check_out_filter': check_out,
         'sort': sort,
     })
 
 
+@anonymous_page_cache()
 def property_detail(request, property_id):
     prop = get_object_or_404(
         Property,
@@ -684,45 +630,12 @@ def get_property_recommendations(target_property, limit=4):
     - Similar bedroom/bathroom count
     - Different property (not the same one)
     - Verified properties only
-    """
-    # Base queryset - exclude current property and unverified
-    similar_properties = Property.objects.filter(
-        is_verified=True
-    ).exclude(id=target_property.id)
-
-    # Calculate similarity scores
-    recommendations = []
-
-    for prop in similar_properties:
-        score = 0
-
-        # City match (highest weight: 40 points)
-        if prop.city.lower() == target_property.city.lower():
-            score += 40
-
-        # Price similarity (30 points max)
-        price_diff = abs(float(prop.rent) - float(target_property.rent))
-        price_range = float(target_property.rent) * 0.2  # 20% range
-        if price_diff <= price_range:
-            # Closer prices get higher scores
-            price_score = 30 * (1 - price_diff / (price_range + 1))
-            score += max(0, price_score)
-
-        # Bedroom match (15 points)
-        if prop.bedrooms == target_property.bedrooms:
-            score += 15
-
-        # Bathroom match (15 points)
-        if prop.bathrooms == target_property.bathrooms:
-            score += 15
 
-        # Only include properties with meaningful similarity
-        if score >= 20:  # Minimum threshold
-            recommendations.append((prop, score))
-
-    # Sort by score (highest first) and return top recommendations
-    recommendations.sort(key=lambda x: x[1], reverse=True)
-    return [prop for prop, score in recommendations[:limit]]
+    Candidates are pruned and scored in a single query; see
+    ``listings.recommendations``.
+    """
+    from .recommendations import recommend_similar
+    return recommend_similar(target_property, limit=limit)
 
 
 # =========================
@@ -741,58 +654,32 @@ def fuzzy_search_properties(query, max_results=20):
     if not query or len(query.strip()) < 2:
         return Property.objects.filter(is_verified=True)[:max_results]
 
-    query = query.strip().lower()
-    scored_results = {}  # {property_id: score}
+    sorted_ids = fuzzy_search_ids(query, max_results)
 
-    # Strategy 1: Exact city match (score: 100) - highest priority
-    exact_city = Property.objects.filter(
-        city__iexact=query,
-        is_verified=True
-    )
-    for prop in exact_city:
-        scored_results[prop.id] = 100
+    # Fetch sorted properties maintaining order
+    if sorted_ids:
+        id_to_prop = Property.objects.in_bulk(sorted_ids)
+        return [id_to_prop[pid] for pid in sorted_ids if pid in id_to_prop]
 
-    # Strategy 2: City starts with query (score: 80)
-    city_startswith = Property.objects.filter(
-        city__istartswith=query,
-        is_verified=True
-    ).exclude(id__in=scored_results.keys())
-    for prop in city_startswith:
-        scored_results[prop.id] = 80
+    return []
 
-    # Strategy 3: City contains query (score: 60)
-    city_contains = Property.objects.filter(
-        city__icontains=query,
-        is_verified=True
-    ).exclude(id__in=scored_results.keys())
-    for prop in city_contains:
-        scored_results[prop.id] = 60
 
-    # Strategy 4: Title contains query (score: 40)
-    title_contains = Property.objects.filter(
-        title__icontains=query,
-        is_verified=True
-    ).exclude(id__in=scored_results.keys())
-    for prop in title_contains:
-        scored_results[prop.id] = 40
+def fuzzy_search_ids(query, max_results=20):
+    """
+    Ranked property ids for ``query`` (see ``fuzzy_search_properties``).
 
-    # Strategy 5: Description contains query (score: 30)
-    desc_contains = Property.objects.filter(
-        description__icontains=query,
-        is_verified=True
-    ).exclude(id__in=scored_results.keys())
-    for prop in desc_contains:
-        scored_results[prop.id] = 30
+    Strategies 1-4 (plus address matches) are matched and ranked in a single
+    query against the full-text search index in ``listings.search``.
+    """
+    from .search import ranked_search
 
-    # Strategy 6: Address contains query (score: 25)
-    address_contains = Property.objects.filter(
-        address__icontains=query,
-        is_verified=True
-    ).exclude(id__in=scored_results.keys())
-    for prop in address_contains:
-        scored_results[prop.id] = 25
+    if not query or len(query.strip()) < 2:
+        return list(Property.objects.filter(is_verified=True).values_list('id', flat=True)[:max_results])
 
-    # Strategy 7: Phonetic similarity (score: 50)
+    query = query.strip().lower()
+    scored_results = dict(ranked_search(query, limit=max_results))  # {property_id: score}
+
+    # Strategy 5: Phonetic similarity (score: 50)
     if len(scored_results) < max_results:
         phonetic_limit = max_results - len(scored_results)
         phonetic_matches = get_phonetic_matches(query, phonetic_limit)
@@ -800,92 +687,26 @@ def fuzzy_search_properties(query, max_results=20):
             if prop.id not in scored_results:
                 scored_results[prop.id] = 50
 
-    # Sort by score (descending) and get property objects
+    # Sort by score (descending)
     sorted_ids = sorted(scored_results.items(), key=lambda x: x[1], reverse=True)
-    sorted_ids = [pid for pid, score in sorted_ids]
-    
-    # Fetch sorted properties maintaining order
-    if sorted_ids:
-        properties = Property.objects.filter(id__in=sorted_ids[:max_results])
-        # Reorder results by sorted_ids
-        id_to_prop = {p.id: p for p in properties}
-        results = [id_to_prop[pid] for pid in sorted_ids[:max_results] if pid in id_to_prop]
-        return results
-    
-    return []
+    return [pid for pid, score in sorted_ids][:max_results]
 
 
 def get_phonetic_matches(query, limit=5):
     """
-    Phonetic matching for city names using proper Soundex algorithm.
-    More efficient: only checks cities that haven't been matched yet.
+    Phonetic matching for city names using Soundex plus a
+    transliteration-tolerant key (e.g. "Katmandu" matches "Kathmandu").
+    Both keys are stored on Property at save time, so this is a single
+    indexed equality query.
     """
-    def get_soundex_code(word):
-        """Generate proper Soundex code (4 chars: 1 letter + 3 digits)"""
-        if not word or len(word) == 0:
-            return "0000"
-
-        word = word.upper().strip()
-        if not word:
-            return "0000"
-        
-        # Keep first letter
-        first = word[0]
-        code = first
-
-        # Soundex mapping (standard)
-        mapping = {
-            'BFPV': '1', 'CGJKQSXZ': '2', 'DT': '3',
-            'L': '4', 'MN': '5', 'R': '6'
-            # Vowels (AEIOUHWY) are ignored (not added to code)
-        }
-
-        prev_digit = None
-        # Process letters after first
-        for char in word[1:]:
-            if len(code) >= 4:
-                break
-            
-            # Skip vowels and ignored characters
-            if char in 'AEIOUHWY':
-                prev_digit = None
-                continue
-            
-            # Find soundex digit for this character
-            digit = None
-            for key, value in mapping.items():
-                if char in key:
-                    digit = value
-                    break
-            
-            # Add digit if found and different from previous
-            if digit and digit != prev_digit:
-                code += digit
-                prev_digit = digit
-
-        # Pad with zeros to 4 characters
-        return (code + '000')[:4]
-
-    query_code = get_soundex_code(query)
-    
-    # Get distinct cities using Python (SQLite doesn't support DISTINCT ON)
-    unique_cities = set()
-    for prop in Property.objects.filter(is_verified=True).values_list('city', flat=True):
-        unique_cities.add(prop.lower())
-    
-    # Find cities with matching Soundex code
-    similar_cities = []
-    for city in unique_cities:
-        city_code = get_soundex_code(city)
-        if city_code == query_code:
-            # Fetch all properties with this city
-            similar_cities.extend(
-                Property.objects.filter(city__iexact=city, is_verified=True)
-            )
-            if len(similar_cities) >= limit:
-                break
+    from .phonetics import phonetic_key, soundex
 
-    return similar_cities[:limit]
+    query_code = soundex(query)
+    query_key = phonetic_key(query)
+    match = Q(city_soundex=query_code)
+    if query_key:
+        match |= Q(city_phonetic=query_key)
+    return list(Property.objects.filter(match, is_verified=True)[:limit])
 
 
 def location(request):
@@ -903,33 +724,26 @@ def contact(request):
         message = request.POST.get('message', '').strip()
         
         if name and email and message:
-            try:
-                # Send email to admin
-                send_mail(
+            # queued, not sent: the relay is never on the request path (listings.outbox)
+            with transaction.atomic():
+                # Email to admin
+                enqueue_email(
                     subject=f'Rental Connect Contact: {name}',
                     message=f'From: {name} ({email})\n\nMessage:\n{message}',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.DEFAULT_FROM_EMAIL],  # Send to admin
-                    fail_silently=False,
+                    recipient_list=[settings.DEFAULT_FROM_EMAIL],
                 )
-                
-                # Send confirmation email to user
-                send_mail(
+
+                # Confirmation email to user
+                enqueue_email(
                     subject='Thank you for contacting Rental Connect',
                     message=f'Dear {name},\n\nThank you for contacting us. We have received your message and will get back to you soon.\n\nYour message:\n{message}\n\nBest regards,\nRental Connect Team',
-                    from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=[email],
-                    fail_silently=False,
                 )
-                
-                return render(request, 'contact.html', {
-                    'success': True,
-                    'message': 'Thank you! Your message has been sent successfully.'
-                })
-            except Exception as e:
-                return render(request, 'contact.html', {
-                    'error': 'Sorry, there was an error sending your message. Please try again later.'
-                })
+
+            return render(request, 'contact.html', {
+                'success': True,
+                'message': 'Thank you! Your message has been sent successfully.'
+            })
         else:
             return render(request, 'contact.html', {
                 'error': 'Please fill in all fields.'
@@ -958,7 +772,7 @@ def add_property(request):
     # Validate individual images
     valid_images = []
     for idx, image_file in enumerate(images_list, 1):
-        is_valid, error_msg, img_info = validate_image_file(image_file)
+        is_valid, error_msg, img_info = validate_upload(image_file)
         if not is_valid:
             image_errors.append(f"Image {idx}: {error_msg}")
         else:
@@ -971,14 +785,10 @@ def add_property(request):
             prop.is_verified = False  # admin must verify
             prop.save()
 
-            # Handle multiple image uploads with optimization
-            from .models import PropertyImage
-            for image_file in valid_images:
-                # Optimize image before saving
-                optimized = save_and_optimize_image(image_file)
-                PropertyImage.objects.create(property=prop, image=optimized)
+            # Store uploads as-is; renditions are generated in the background
+            store_uploads(prop, valid_images)
 
-            Notification.objects.create(
+            notify(
                 recipient=request.user,
                 actor=request.user,
                 title="Property submitted for verification",
@@ -1030,7 +840,6 @@ def edit_property(request, property_id):
         valid_images = []
         
         if images_list:
-            from .models import PropertyImage
             current_count = prop.images.count()
             
             # Validate image count
@@ -1039,7 +848,7 @@ def edit_property(request, property_id):
             
             # Validate individual images
             for idx, image_file in enumerate(images_list, 1):
-                is_valid, error_msg, img_info = validate_image_file(image_file)
+                is_valid, error_msg, img_info = validate_upload(image_file)
                 if not is_valid:
                     image_errors.append(f"Image {idx}: {error_msg}")
                 else:
@@ -1048,10 +857,8 @@ def edit_property(request, property_id):
             # Save valid images
             if valid_images and not image_errors:
                 try:
-                    for image_file in valid_images:
-                        # Optimize image before saving
-                        optimized = save_and_optimize_image(image_file)
-                        PropertyImage.objects.create(property=prop, image=optimized)
+                    # Store uploads as-is; renditions are generated in the background
+                    store_uploads(prop, valid_images)
                 except Exception as e:
                     image_errors.append(f"Error uploading images: {str(e)}")
         
@@ -1123,30 +930,29 @@ def request_booking(request, property_id):
         form = BookingForm(request.POST, tenant=request.user, property=prop)
 
         if form.is_valid():
-            # Manually create booking with all required fields to avoid incomplete instance
+            # Overlap check and insert happen in one transaction under a row lock
             try:
-                booking = Booking(
-                    property=prop,
-                    tenant=request.user,
-                    start_date=form.cleaned_data['start_date'],
-                    end_date=form.cleaned_data['end_date'],
+                booking = check_and_reserve(
+                    prop,
+                    request.user,
+                    form.cleaned_data['start_date'],
+                    form.cleaned_data['end_date'],
                     status='pending',
                     monthly_rent=prop.rent,
                     # default deposit equal to one month rent (can be modified later)
                     security_deposit=prop.rent,
                     lock_in_months=0,
                 )
-                # Run validation from Booking model (date overlap, invalid dates)
-                booking.full_clean()
-                booking.save()
 
                 # Notify landlord about new booking request
-                Notification.objects.create(
+                notify(
                     recipient=prop.landlord,
                     actor=request.user,
                     title="New booking request",
                     message=f"{request.user.username} requested {prop.title} ({booking.start_date} → {booking.end_date}).",
                     target_url="/#dashboard",
+                    digest_key="booking-request",
+                    digest_title="new booking requests",
                 )
                 return redirect('dashboard')
             except ValidationError as e:
@@ -1200,7 +1006,7 @@ def manage_booking(request, booking_id, action):
     booking.save()
 
     # Notify tenant about decision
-    Notification.objects.create(
+    notify(
         recipient=booking.tenant,
         actor=request.user,
         title=f"Booking {booking.status}",
@@ -1222,23 +1028,24 @@ def booking_messages(request, booking_id):
     """
     from .models import BookingMessage
     
-    booking = get_object_or_404(Booking, id=booking_id)
-    
     # Security check: only tenant or landlord of the property can message
-    if request.user != booking.tenant and request.user != booking.property.landlord:
+    role = booking_role(request.user, booking_id)
+    if role is None:
         return render(request, 'listings/forbidden.html', {
             'message': 'You are not authorized to access messages for this booking.',
-            'booking': booking,
+            'booking': get_object_or_404(Booking.objects.select_related('property'), id=booking_id),
         })
-    
-    # Get all messages for this booking
-    messages = booking.messages.all()
+
+    booking = get_object_or_404(Booking.objects.select_related('tenant', 'property__landlord'), id=booking_id)
     
     # Mark messages as read for current user
-    messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+    booking.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
+
+    # Latest page only; older pages are fetched from booking_messages_history
+    messages, history_cursor = history_page(booking_id)
     
     # Get other user (tenant or landlord)
-    if request.user == booking.tenant:
+    if role == 'tenant':
         other_user = booking.property.landlord
         user_role = "Tenant"
     else:
@@ -1259,14 +1066,14 @@ def booking_messages(request, booking_id):
             )
             
             # Notify the other user about new message
-            if request.user == booking.tenant:
+            if role == 'tenant':
                 notif_recipient = booking.property.landlord
                 notif_title = f"New message from tenant on {booking.property.title}"
             else:
                 notif_recipient = booking.tenant
                 notif_title = f"New message from landlord about {booking.property.title}"
             
-            Notification.objects.create(
+            notify(
                 recipient=notif_recipient,
                 actor=request.user,
                 title=notif_title,
@@ -1284,25 +1091,48 @@ def booking_messages(request, booking_id):
     return render(request, 'listings/booking_messages.html', {
         'booking': booking,
         'messages': messages,
+        'history_cursor': history_cursor,
+        'last_message_id': messages[-1].pk if messages else 0,
         'other_user': other_user,
         'user_role': user_role,
     })
 
 
+@login_required
+def booking_messages_history(request, booking_id):
+    """
+    JSON page of older chat messages:
+    ?before=<cursor>&limit=<n> -> {"messages": [...oldest first], "next_cursor": ...}
+    """
+    if not is_booking_participant(request.user, booking_id):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        limit = int(request.GET.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        limit = HISTORY_PAGE_SIZE
+    messages, next_cursor = history_page(booking_id, request.GET.get('before') or None, limit)
+    return JsonResponse({
+        'messages': [serialize_message(m) for m in messages],
+        'next_cursor': next_cursor,
+    })
+
+
 
 @login_required
 def booking_detail(request, booking_id):
     """
     View details of a booking with option to message.
     """
-    booking = get_object_or_404(Booking, id=booking_id)
-    
     # Security check: only tenant or landlord can view
-    if request.user != booking.tenant and request.user != booking.property.landlord:
+    role = booking_role(request.user, booking_id)
+    if role is None:
         return render(request, 'listings/forbidden.html', {
             'message': 'You are not authorized to view this booking.',
-            'booking': booking,
+            'booking': get_object_or_404(Booking.objects.select_related('property'), id=booking_id),
         })
+
+    booking = get_object_or_404(Booking.objects.select_related('tenant', 'property__landlord'), id=booking_id)
     
     # Get unread message count
     unread_count = booking.messages.filter(is_read=False).exclude(sender=request.user).count()
@@ -1310,12 +1140,12 @@ def booking_detail(request, booking_id):
     # compute actions availability
     today = timezone.now().date()
     can_cancel = (
-        request.user == booking.tenant and
+        role == 'tenant' and
         booking.status in ['pending', 'approved'] and
         booking.start_date > today
     )
     can_finalize = (
-        request.user == booking.property.landlord and
+        role == 'landlord' and
         booking.status == 'approved'
     )
     
@@ -1371,7 +1201,7 @@ def cancel_booking(request, booking_id):
         booking.save()
         
         # Notify landlord about cancellation
-        Notification.objects.create(
+        notify(
             recipient=booking.property.landlord,
             actor=request.user,
             title=f"Booking Cancelled for {booking.property.title}",
@@ -1420,7 +1250,7 @@ def finalize_booking(request, booking_id):
         booking.save()
         
         # Notify tenant
-        Notification.objects.create(
+        notify(
             recipient=booking.tenant,
             actor=request.user,
             title=f"Booking Finalized - {booking.property.title}",
@@ -1478,7 +1308,7 @@ def request_appointment(request, property_id):
             appointment.save()
             
             # Notify landlord
-            Notification.objects.create(
+            notify(
                 recipient=prop.landlord,
                 actor=request.user,
                 title=f"Appointment Request for {prop.title}",
@@ -1540,7 +1370,7 @@ def manage_appointment(request, appointment_id, action):
     appointment.save()
     
     # Notify tenant
-    Notification.objects.create(
+    notify(
         recipient=appointment.tenant,
         actor=request.user,
         title=notif_title,
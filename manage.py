@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rentalConnect.settings')
+    # the test suite has its own settings module (no Redis needed)
+    default_settings = 'rentalConnect.test_settings' if sys.argv[1:2] == ['test'] else 'rentalConnect.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -1,6 +1,8 @@
 from django.urls import re_path
 from listings.consumers import BookingMessageConsumer
+from users.consumers import NotificationConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/booking/(?P<booking_id>\d+)/messages/$', BookingMessageConsumer.as_asgi()),
-]
\ No newline at end of file
+    re_path(r'ws/notifications/$', NotificationConsumer.as_asgi()),
+]
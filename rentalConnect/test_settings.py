@@ -0,0 +1,14 @@
+"""
+Settings for the test suite.
+
+``python manage.py test`` picks this module by default; other runners
+should set ``DJANGO_SETTINGS_MODULE=rentalConnect.test_settings``.
+"""
+from .settings import *  # noqa: F401,F403
+
+# the suite runs without a Redis server
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
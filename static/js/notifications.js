@@ -0,0 +1,86 @@
+// Live navbar notification badge, fed by users.consumers.NotificationConsumer
+document.addEventListener("DOMContentLoaded", function () {
+    const menu = document.getElementById("notifMenu");
+    if (!menu || !("WebSocket" in window)) {
+        return;
+    }
+
+    const badge = document.getElementById("notifBadge");
+    const list = document.getElementById("notifList");
+    const maxItems = 5;
+    const maxReconnectDelay = 30000;
+    let reconnectDelay = 1000;
+    let unreadCount = parseInt(badge.textContent, 10) || 0;
+
+    function renderBadge() {
+        badge.textContent = unreadCount;
+        badge.classList.toggle("d-none", unreadCount <= 0);
+    }
+
+    function readUrl(id) {
+        return menu.dataset.readUrl.replace("/0/", "/" + id + "/");
+    }
+
+    function upsertItem(notification) {
+        const empty = document.getElementById("notifEmpty");
+        if (empty) {
+            empty.remove();
+        }
+        const existing = list.querySelector('[data-notification-id="' + notification.id + '"]');
+        if (existing) {
+            existing.remove();
+        }
+
+        const item = document.createElement("li");
+        item.dataset.notificationId = notification.id;
+        const link = document.createElement("a");
+        link.className = "dropdown-item" + (notification.is_read ? "" : " fw-bold");
+        link.href = readUrl(notification.id);
+        const title = document.createElement("div");
+        title.className = "small";
+        title.textContent = notification.title;
+        link.appendChild(title);
+        if (notification.message) {
+            const message = document.createElement("div");
+            message.className = "small text-muted text-truncate";
+            message.textContent = notification.message;
+            link.appendChild(message);
+        }
+        item.appendChild(link);
+
+        // header and divider come first
+        const divider = list.querySelector(".dropdown-divider").parentElement;
+        divider.after(item);
+        const items = list.querySelectorAll("[data-notification-id]");
+        for (let i = maxItems; i < items.length; i++) {
+            items[i].remove();
+        }
+    }
+
+    function connect() {
+        const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+        const socket = new WebSocket(protocol + "//" + window.location.host + menu.dataset.wsPath);
+
+        socket.onopen = function () {
+            reconnectDelay = 1000;
+        };
+
+        socket.onmessage = function (e) {
+            const data = JSON.parse(e.data);
+            if (data.type === "notification") {
+                unreadCount += data.unread_delta;
+                upsertItem(data.notification);
+            } else if (data.type === "unread_count") {
+                unreadCount = data.unread_count;
+            }
+            renderBadge();
+        };
+
+        socket.onclose = function () {
+            setTimeout(connect, reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, maxReconnectDelay);
+        };
+    }
+
+    connect();
+});
@@ -0,0 +1,51 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .notifications import get_notification_summary, notification_group
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Per-user notification stream for the navbar badge.
+
+    On connect the current unread count is sent; afterwards every event
+    pushed by ``users.notifications`` to the user's group is forwarded:
+
+        {"type": "notification", "notification": {...}, "unread_delta": 1}
+        {"type": "unread_count", "unread_count": 3}
+    """
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = notification_group(user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        summary = await database_sync_to_async(get_notification_summary)(user.pk)
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': summary['unread_count'],
+        }))
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_delta': event['unread_delta'],
+        }))
+
+    async def notification_count(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': event['unread_count'],
+        }))
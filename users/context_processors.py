@@ -1,10 +1,11 @@
-from .models import Notification
+from .notifications import get_notification_summary
 
 
 def notifications(request):
     """
     Makes notification data available in all templates.
-    Keep it lightweight: unread count + latest few notifications.
+    Keep it lightweight: unread count + latest few notifications, served
+    from the per-user cache in users.notifications.
     """
     user = getattr(request, "user", None)
     if not user or not user.is_authenticated:
@@ -13,12 +14,8 @@ def notifications(request):
             "notifications_latest": [],
         }
 
-    qs = Notification.objects.filter(recipient=user).only(
-        "id", "title", "message", "target_url", "is_read", "created_at"
-    )
-
+    summary = get_notification_summary(user.pk)
     return {
-        "notifications_unread_count": qs.filter(is_read=False).count(),
-        "notifications_latest": list(qs[:5]),
+        "notifications_unread_count": summary["unread_count"],
+        "notifications_latest": summary["latest"],
     }
-
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='digest_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='digest_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
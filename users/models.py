@@ -58,6 +58,10 @@ class Notification(models.Model):
     target_url = models.CharField(max_length=300, blank=True)  # relative URL (e.g. /property/1/)
     is_read = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # notifications sharing a digest key are folded into one unread row
+    # ("3 new booking requests"); see users.notifications.send_notifications
+    digest_key = models.CharField(max_length=64, blank=True, db_index=True)
+    digest_count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ["-created_at"]
@@ -0,0 +1,222 @@
+"""
+Notification delivery, real-time push and the cached navbar summary.
+
+Delivery: ``notify`` / ``notify_many`` / ``send_notifications`` persist any
+number of notifications in a constant number of queries (one lookup for
+duplicates and digests, one bulk UPDATE, one bulk INSERT), whatever the
+number of recipients.
+
+Push: once the writing transaction commits, new rows and unread-count
+changes are sent over the channel layer to the recipient's
+``notifications_<user id>`` group, served by ``users.consumers``.
+
+Summary: the unread count + latest few notification headers are stored in
+Django's cache framework, so rendering a page costs no notification queries
+while the entry is warm. ``users.signals`` drops the entry when a
+Notification is saved or deleted; code that changes notifications with
+``QuerySet.update()`` or ``bulk_create()`` must call
+``invalidate_notification_summary`` itself.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+NOTIFICATION_SUMMARY_SIZE = 5
+NOTIFICATION_SUMMARY_TIMEOUT = 600
+
+logger = logging.getLogger(__name__)
+
+
+def _summary_key(user_id):
+    return f'notification-summary:{user_id}'
+
+
+def invalidate_notification_summary(*user_ids):
+    cache.delete_many([_summary_key(user_id) for user_id in user_ids if user_id])
+
+
+def get_notification_summary(user_id):
+    """Return {'unread_count': int, 'latest': [header dicts]} for ``user_id``."""
+    key = _summary_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        qs = Notification.objects.filter(recipient_id=user_id)
+        latest = list(
+            qs.values('id', 'title', 'message', 'target_url', 'is_read', 'created_at')[:NOTIFICATION_SUMMARY_SIZE]
+        )
+        summary = {
+            'unread_count': qs.filter(is_read=False).count(),
+            'latest': latest,
+        }
+        cache.set(key, summary, NOTIFICATION_SUMMARY_TIMEOUT)
+    return summary
+
+
+# =========================
+# PUSH
+# =========================
+def notification_group(user_id):
+    return f'notifications_{user_id}'
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.pk,
+        'title': notification.title,
+        'message': notification.message,
+        'target_url': notification.target_url,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def _group_send(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        send = async_to_sync(channel_layer.group_send)
+        for user_id, event in events:
+            send(notification_group(user_id), event)
+    except Exception:
+        # the badge catches up on the next page render
+        logger.warning("Could not push notification events", exc_info=True)
+
+
+def push_notifications(created=(), updated=()):
+    """
+    Push new rows (``created``) and refreshed digest rows (``updated``, which
+    were already unread) to their recipients' sockets.
+    """
+    _group_send(
+        [
+            (n.recipient_id, {
+                'type': 'notification.created',
+                'notification': serialize_notification(n),
+                'unread_delta': 0 if n.is_read else 1,
+            })
+            for n in created
+        ] + [
+            (n.recipient_id, {
+                'type': 'notification.created',
+                'notification': serialize_notification(n),
+                'unread_delta': 0,
+            })
+            for n in updated
+        ]
+    )
+
+
+def push_unread_count(*user_ids):
+    """Push the absolute unread count, e.g. after notifications were marked read."""
+    _group_send([
+        (user_id, {
+            'type': 'notification.count',
+            'unread_count': get_notification_summary(user_id)['unread_count'],
+        })
+        for user_id in user_ids
+    ])
+
+
+# =========================
+# DELIVERY
+# =========================
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def send_notifications(notifications, digest_title=None):
+    """
+    Save unsaved Notification instances in bulk and return the rows written.
+
+    - A notification identical (title, message, target_url) to an unread one
+      the recipient already has, or to an earlier one in the batch, is dropped.
+    - When ``digest_title`` is given, notifications with a ``digest_key`` are
+      folded per (recipient, digest_key) into a single unread row titled
+      "<count> <digest_title>" carrying the latest message, e.g.
+      "5 new booking requests".
+    """
+    notifications = [n for n in notifications if n.recipient_id]
+    if not notifications:
+        return []
+    recipient_ids = {n.recipient_id for n in notifications}
+    digest_keys = {n.digest_key for n in notifications if n.digest_key} if digest_title else set()
+
+    unread = Notification.objects.filter(recipient_id__in=recipient_ids, is_read=False).order_by()
+    seen = set(
+        unread.filter(title__in={n.title for n in notifications})
+        .values_list('recipient_id', 'title', 'message', 'target_url')
+    )
+    digests = {}
+    if digest_keys:
+        for row in unread.filter(digest_key__in=digest_keys):
+            digests[(row.recipient_id, row.digest_key)] = row
+
+    now = timezone.now()
+    created, updated = [], {}
+    for n in notifications:
+        if n.digest_key and digest_title:
+            key = (n.recipient_id, n.digest_key)
+            row = digests.get(key)
+            if row is None:
+                digests[key] = n
+                created.append(n)
+                continue
+            row.digest_count += 1
+            row.title = f"{row.digest_count} {digest_title}"[:120]
+            row.message, row.target_url, row.actor_id = n.message, n.target_url, n.actor_id
+            row.created_at = now
+            if row.pk:
+                updated[row.pk] = row
+            continue
+        signature = (n.recipient_id, n.title, n.message, n.target_url)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        created.append(n)
+
+    if updated:
+        with transaction.atomic():
+            Notification.objects.bulk_update(
+                updated.values(), ['title', 'message', 'target_url', 'actor', 'digest_count', 'created_at']
+            )
+            Notification.objects.bulk_create(created)
+    elif created:
+        Notification.objects.bulk_create(created)
+    # bulk writes bypass post_save, so drop the cached summaries here
+    invalidate_notification_summary(*recipient_ids)
+    updated = list(updated.values())
+    transaction.on_commit(lambda: push_notifications(created, updated))
+    return created + updated
+
+
+def notify_many(recipients, title, message='', target_url='', actor=None, digest_key='', digest_title=None):
+    """Send the same notification to every user (or user id) in ``recipients``."""
+    actor_id = _user_id(actor)
+    return send_notifications(
+        [
+            Notification(
+                recipient_id=_user_id(recipient),
+                actor_id=actor_id,
+                title=title,
+                message=message,
+                target_url=target_url,
+                digest_key=digest_key,
+            )
+            for recipient in dict.fromkeys(recipients)
+        ],
+        digest_title=digest_title,
+    )
+
+
+def notify(recipient, title, message='', target_url='', actor=None, digest_key='', digest_title=None):
+    return notify_many(
+        [recipient], title, message=message, target_url=target_url, actor=actor,
+        digest_key=digest_key, digest_title=digest_title,
+    )
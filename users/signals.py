@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .notifications import invalidate_notification_summary, push_notifications, push_unread_count
+
+
+# =========================
+# NOTIFICATION SUMMARY CACHE
+# =========================
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def notification_changed_invalidate_summary(sender, instance, **kwargs):
+    invalidate_notification_summary(instance.recipient_id)
+
+
+# =========================
+# REAL-TIME PUSH
+# =========================
+@receiver(post_save, sender=Notification)
+def notification_saved_push(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: push_notifications([instance]))
+    else:
+        transaction.on_commit(lambda: push_unread_count(instance.recipient_id))
@@ -1,6 +1,14 @@
-from django.test import TestCase
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
 
-from .models import CustomUser
+from .consumers import NotificationConsumer
+from .context_processors import notifications
+from .notifications import notify, notify_many
+from .models import CustomUser, Notification
 from .forms import SimpleRegisterForm
 
 
@@ -47,3 +55,133 @@ class RegistrationTests(TestCase):
         })
         self.assertFalse(form.is_valid())
         self.assertIn("email", form.errors)
+
+
+class NotificationSummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username="reader", password="password12345", is_tenant=True
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_warm_summary_costs_no_queries(self):
+        Notification.objects.create(recipient=self.user, title="Hi", message="One")
+        first = notifications(self.request)
+        with self.assertNumQueries(0):
+            second = notifications(self.request)
+        self.assertEqual(first, second)
+        self.assertEqual(second["notifications_unread_count"], 1)
+        self.assertEqual(second["notifications_latest"][0]["title"], "Hi")
+
+    def test_new_notification_invalidates_summary(self):
+        notifications(self.request)
+        Notification.objects.create(recipient=self.user, title="New", message="Two")
+        ctx = notifications(self.request)
+        self.assertEqual(ctx["notifications_unread_count"], 1)
+        self.assertEqual(ctx["notifications_latest"][0]["title"], "New")
+
+    def test_mark_read_views_invalidate_summary(self):
+        first = Notification.objects.create(recipient=self.user, title="A", message="a")
+        Notification.objects.create(recipient=self.user, title="B", message="b")
+        self.client.force_login(self.user)
+        self.assertEqual(notifications(self.request)["notifications_unread_count"], 2)
+
+        self.client.post(reverse("notification_mark_read", args=[first.pk]))
+        self.assertEqual(notifications(self.request)["notifications_unread_count"], 1)
+
+        self.client.post(reverse("notifications_mark_all_read"))
+        self.assertEqual(notifications(self.request)["notifications_unread_count"], 0)
+
+
+class NotifyManyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            CustomUser.objects.create_user(username=f"n{i}", password="password12345")
+            for i in range(20)
+        ]
+
+    def test_fan_out_uses_constant_queries(self):
+        # duplicate lookup + bulk insert, whatever the number of recipients
+        with self.assertNumQueries(2):
+            notify_many(self.users[:2], title="Maintenance", message="Tonight")
+        with self.assertNumQueries(2):
+            notify_many(self.users, title="Outage", message="Tomorrow")
+        self.assertEqual(Notification.objects.filter(title="Outage").count(), 20)
+
+    def test_identical_unread_notifications_are_deduplicated(self):
+        notify_many(self.users[:3], title="Hello", message="World")
+        notify_many(self.users[:5] + self.users[:5], title="Hello", message="World")
+        self.assertEqual(Notification.objects.filter(title="Hello").count(), 5)
+
+        Notification.objects.filter(recipient=self.users[0]).update(is_read=True)
+        notify(self.users[0], title="Hello", message="World")
+        self.assertEqual(Notification.objects.filter(recipient=self.users[0]).count(), 2)
+
+    def test_digest_coalesces_into_one_row(self):
+        user = self.users[0]
+        for i in range(3):
+            notify(
+                user, title="New booking request", message=f"Request {i}",
+                digest_key="booking-request", digest_title="new booking requests",
+            )
+        rows = list(Notification.objects.filter(recipient=user))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].title, "3 new booking requests")
+        self.assertEqual(rows[0].message, "Request 2")
+
+        rows[0].is_read = True
+        rows[0].save()
+        notify(
+            user, title="New booking request", message="Request 3",
+            digest_key="booking-request", digest_title="new booking requests",
+        )
+        self.assertEqual(Notification.objects.filter(recipient=user, is_read=False).get().title, "New booking request")
+
+    def test_bulk_send_invalidates_cached_summary(self):
+        request = RequestFactory().get("/")
+        request.user = self.users[0]
+        self.assertEqual(notifications(request)["notifications_unread_count"], 0)
+        notify_many(self.users, title="Broadcast")
+        self.assertEqual(notifications(request)["notifications_unread_count"], 1)
+
+
+class NotificationPushTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username="live", password="password12345")
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), "/ws/notifications/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    def _notify_and_commit(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.user, **kwargs)
+
+    def _mark_all_read(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("notifications_mark_all_read"))
+
+    async def test_anonymous_connection_is_rejected(self):
+        communicator, connected = await self._connect(AnonymousUser())
+        self.assertFalse(connected)
+
+    async def test_new_notification_is_pushed_with_delta(self):
+        communicator, connected = await self._connect(self.user)
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {"type": "unread_count", "unread_count": 0})
+
+        await database_sync_to_async(self._notify_and_commit)(title="Booking approved", message="Welcome")
+        event = await communicator.receive_json_from()
+        self.assertEqual(event["type"], "notification")
+        self.assertEqual(event["unread_delta"], 1)
+        self.assertEqual(event["notification"]["title"], "Booking approved")
+
+        await database_sync_to_async(self._mark_all_read)()
+        self.assertEqual(await communicator.receive_json_from(), {"type": "unread_count", "unread_count": 0})
+        await communicator.disconnect()
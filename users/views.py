@@ -4,9 +4,11 @@ from django.contrib.auth.decorators import login_required
 
 from .models import Profile, Notification
 from .forms import ProfileForm, SimpleRegisterForm
+from .notifications import invalidate_notification_summary, push_unread_count
 from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from listings.models import Booking, Property, PropertyVerificationRequest, EarlyExitRequest
+from listings.stats import get_landlord_stats, get_tenant_stats
 from listings.utils import haversine
 
 
@@ -77,15 +79,7 @@ def dashboard(request):
                         (booking.property.latitude, booking.property.longitude)
                     )
 
-        exit_requests = EarlyExitRequest.objects.filter(booking__tenant=request.user)
-        stats = {
-            'total_bookings': bookings.count(),
-            'pending_bookings': bookings.filter(status='pending').count(),
-            'approved_bookings': bookings.filter(status='approved').count(),
-            'rejected_bookings': bookings.filter(status='rejected').count(),
-            'active_bookings': bookings.filter(status__in=['approved', 'rented_out']).count(),
-            'exit_requests': exit_requests.count(),
-        }
+        stats = get_tenant_stats(request.user)
 
     if request.user.is_landlord:
         properties = Property.objects.filter(
@@ -103,15 +97,7 @@ def dashboard(request):
             property__landlord=request.user
         ).select_related('property', 'tenant').order_by('-created_at')
 
-        landlord_exits = EarlyExitRequest.objects.filter(booking__property__landlord=request.user)
-        stats = {
-            'total_properties': properties.count(),
-            'verified_properties': properties.filter(is_verified=True).count(),
-            'unverified_properties': properties.filter(is_verified=False).count(),
-            'pending_booking_requests': landlord_bookings.filter(status='pending').count(),
-            'active_tenants': landlord_bookings.filter(status='rented_out').count(),
-            'exit_requests': landlord_exits.count(),
-        }
+        stats = get_landlord_stats(request.user)
 
     return render(request, 'users/dashboard.html', {
         'is_admin': request.user.is_superuser,
@@ -190,4 +176,8 @@ def notifications_mark_all_read(request):
             recipient=request.user,
             is_read=False
         ).update(is_read=True)
+        # update() bypasses post_save, so drop the cached badge and push the
+        # new count explicitly
+        invalidate_notification_summary(request.user.pk)
+        push_unread_count(request.user.pk)
     return redirect('notifications')